@@ -0,0 +1,365 @@
+"""
+Benchmarks of the inattention detection pipeline on recorded clips (or
+synthetic frames when no clip is given).
+
+Run from the src directory:
+    python -m inattention.benchmark <clip>                  # detection scales
+    python -m inattention.benchmark <clip> -backends dlib opencv
+    python -m inattention.benchmark [<clip>] -stages -json out.json
+"""
+
+import json
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Any, cast
+
+import cv2
+import numpy as np
+import psutil
+
+from .detector import DetectionHistory, FileCameraStream
+from .drowsiness import DrowsinessMetrics
+from .utils import LANDMARK_BACKENDS, CameraStream, EyeClassifier, EyeStateDetector, create_landmark_backend
+
+STAGES = ["capture", "gray", "detection", "landmarks", "ear", "aggregation"]
+"""Stages of the pipeline measured by benchmark_stages, in order"""
+
+
+def load_grayscale_frames(path: str, max_frames: int | None = None) -> list[np.ndarray]:
+    """Load a recording (see FileCameraStream) into a list of grayscale frames."""
+    frames = []
+    with FileCameraStream(path) as stream:
+        while max_frames is None or len(frames) < max_frames:
+            frame = stream.next_grayscale()
+            if stream.exhausted:
+                break
+            frames.append(frame)
+    return frames
+
+
+def run_detector(
+    detector: EyeStateDetector, frames: list[np.ndarray]
+) -> tuple[float, list[float | None], list[float]]:
+    """
+    Run the detector on every frame.
+
+    Returns
+    -------
+    tuple[float, list[float | None], list[float]]
+        The frames per second, for each frame the EAR of the first face found
+        (None if no face was found) and the latency (seconds) of each frame.
+    """
+    ears: list[float | None] = []
+    latencies: list[float] = []
+    start = time.perf_counter()
+    for frame in frames:
+        frame_start = time.perf_counter()
+        results = detector.predict(frame)
+        latencies.append(time.perf_counter() - frame_start)
+        ears.append(float(results[0].ear) if results else None)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, ears, latencies
+
+
+def compare_ears(ears: list[float | None], baseline: list[float | None]) -> dict[str, float]:
+    """
+    Compare the EAR of each frame against the baseline ones.
+
+    Returns the mean and max absolute EAR deviation (over the frames in which
+    both found a face) and the fraction of frames in which they agree about the
+    presence of a face.
+    """
+    deviations = [abs(e - b) for e, b in zip(ears, baseline) if e is not None and b is not None]
+    agreement = sum(1 for e, b in zip(ears, baseline) if (e is None) == (b is None))
+    return {
+        "ear_mean_abs_deviation": float(np.mean(deviations)) if deviations else float("nan"),
+        "ear_max_abs_deviation": float(np.max(deviations)) if deviations else float("nan"),
+        "face_agreement": agreement / max(len(baseline), 1),
+    }
+
+
+def benchmark_detection_scale(
+    frames: list[np.ndarray], scales: list[float], upsample: int, threshold: float
+) -> list[dict[str, float]]:
+    """
+    Measure frames/s and EAR deviation of each detection scale against the full
+    resolution baseline (tracking is disabled so that every frame is detected).
+    """
+    baseline_fps, baseline_ears, _ = run_detector(
+        EyeStateDetector(threshold, detection_scale=1.0, upsample=upsample), frames
+    )
+    reports = [{"scale": 1.0, "upsample": upsample, "fps": baseline_fps, **compare_ears(baseline_ears, baseline_ears)}]
+    for scale in scales:
+        if scale == 1.0:
+            continue
+        fps, ears, _ = run_detector(EyeStateDetector(threshold, detection_scale=scale, upsample=upsample), frames)
+        reports.append({"scale": scale, "upsample": upsample, "fps": fps, **compare_ears(ears, baseline_ears)})
+    return reports
+
+
+def label_agreement(ears: list[float | None], baseline: list[float | None], threshold: float) -> float:
+    """
+    Fraction of the frames in which both found a face where the eyes are classified
+    in the same way (open or closed) with the given threshold.
+    """
+    both = [(e, b) for e, b in zip(ears, baseline) if e is not None and b is not None]
+    if not both:
+        return float("nan")
+    return sum(1 for e, b in both if (e >= threshold) == (b >= threshold)) / len(both)
+
+
+def benchmark_backends(
+    frames: list[np.ndarray], backends: list[str], threshold: float, upsample: int = 1
+) -> list[dict[str, float | str]]:
+    """
+    Measure latency, frames/s and EAR agreement of each landmark backend against
+    the first one (tracking is disabled so that every frame is detected).
+    upsample only applies to the dlib backend.
+    """
+    reports: list[dict[str, float | str]] = []
+    baseline_ears: list[float | None] | None = None
+    for backend in backends:
+        fps, ears, latencies = run_detector(EyeStateDetector(threshold, upsample=upsample, backend=backend), frames)
+        if baseline_ears is None:
+            baseline_ears = ears
+        reports.append(
+            {
+                "backend": backend,
+                "fps": fps,
+                "latency_p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+                "latency_p95": float(np.percentile(latencies, 95)) if latencies else float("nan"),
+                **compare_ears(ears, baseline_ears),
+                "label_agreement": label_agreement(ears, baseline_ears, threshold),
+            }
+        )
+    return reports
+
+
+class SyntheticCameraStream(CameraStream):
+    """
+    Camera stream of random noise frames, to benchmark without a recording
+    (faces are never found, so the landmarks stage is not exercised).
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, pool_size: int = 16, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self._frames = rng.integers(0, 256, (pool_size, height, width, 3), dtype=np.uint8)
+        self._index = 0
+
+    def next(self) -> np.ndarray:
+        # a copy, like a camera returning a new frame each time
+        frame = self._frames[self._index % len(self._frames)].copy()
+        self._index += 1
+        return frame
+
+    def next_grayscale(self) -> np.ndarray:
+        return cv2.cvtColor(self.next(), cv2.COLOR_BGR2GRAY)
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """Percentiles and mean (milliseconds) of the given latencies (seconds)."""
+    if not latencies:
+        return {"p50_ms": float("nan"), "p95_ms": float("nan"), "p99_ms": float("nan"), "mean_ms": float("nan")}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+    }
+
+
+def benchmark_stages(
+    stream: CameraStream,
+    frames: int,
+    backend: str = "dlib",
+    threshold: float = 0.23,
+    tracking: bool = False,
+    upsample: int = 1,
+) -> dict[str, Any]:
+    """
+    Run frames through each stage of the pipeline (see STAGES), timing every stage
+    separately: capture from the stream, grayscale conversion, face detection,
+    landmarks, EAR and aggregation (verdict, detection history and drowsiness
+    metrics, as done by InattentionDetector).
+
+    Returns
+    -------
+    dict[str, Any]
+        Per stage latency summary, frames/s of the whole pipeline, faces found
+        and resident memory (MB) before building the pipeline, after the first
+        frame and at the peak.
+    """
+    process = psutil.Process()
+    rss_start = process.memory_info().rss
+    landmark_backend = create_landmark_backend(backend, tracking=tracking, upsample=upsample)
+    classifier = EyeClassifier(threshold)
+    history = DetectionHistory()
+    metrics = DrowsinessMetrics()
+
+    latencies: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    faces_found = 0
+    rss_first_frame = rss_peak = rss_start
+    processed = 0
+    for i in range(frames):
+        t0 = time.perf_counter()
+        frame = stream.next()
+        t1 = time.perf_counter()
+        if getattr(stream, "exhausted", False):
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        t2 = time.perf_counter()
+        faces = landmark_backend.detect_faces(gray)
+        t3 = time.perf_counter()
+        landmarks = landmark_backend.landmarks(gray, faces)
+        t4 = time.perf_counter()
+        results = classifier.classify(landmarks)
+        t5 = time.perf_counter()
+        is_inattent = not any(r.label == 1 for r in results)
+        ear = max((float(r.ear) for r in results), default=float("nan"))
+        history.write(t0, ear, 0 if is_inattent else 1, len(results) > 0)
+        metrics.update(t0, ear, len(results) > 0, is_inattent)
+        t6 = time.perf_counter()
+
+        for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4, t5), (t1, t2, t3, t4, t5, t6)):
+            latencies[stage].append(end - start)
+        faces_found += len(results)
+        processed += 1
+        rss = process.memory_info().rss
+        rss_peak = max(rss_peak, rss)
+        if i == 0:
+            rss_first_frame = rss
+
+    total = sum(sum(v) for v in latencies.values())
+    mb = 1024 * 1024
+    return {
+        "backend": backend,
+        "tracking": tracking,
+        "upsample": upsample,
+        "frames": processed,
+        "faces_found": faces_found,
+        "fps": processed / total if total > 0 else float("nan"),
+        "stages": {stage: latency_summary(latencies[stage]) for stage in STAGES},
+        "memory_mb": {
+            "start": rss_start / mb,
+            "after_first_frame": rss_first_frame / mb,
+            "peak": rss_peak / mb,
+        },
+    }
+
+
+def environment_info() -> dict[str, Any]:
+    """Versions and machine details stored along with the results, to compare runs across commits."""
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": psutil.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("inattention.benchmark")
+    _ = parser.add_argument(
+        "clip",
+        help="Recording of a driver: a video file, a directory of images or a .npy dump of frames. Synthetic frames are used if omitted",
+        type=str,
+        nargs="?",
+        default=None,
+    )
+    _ = parser.add_argument(
+        "-scales",
+        help="Detection scales to compare against the full resolution",
+        type=float,
+        nargs="+",
+        default=[0.75, 0.5, 0.25],
+    )
+    _ = parser.add_argument(
+        "-backends",
+        help="Compare these landmark backends (against the first one) instead of the detection scales",
+        choices=LANDMARK_BACKENDS,
+        nargs="+",
+        default=None,
+    )
+    _ = parser.add_argument(
+        "-stages",
+        help="Measure the latency of each stage of the pipeline instead of the detection scales",
+        action="store_true",
+    )
+    _ = parser.add_argument("-backend", help="Landmark backend used by -stages", choices=LANDMARK_BACKENDS, default="dlib")
+    _ = parser.add_argument("-tracking", help="Enable face tracking in -stages", action="store_true")
+    _ = parser.add_argument("-upsample", help="Upsample factor of the dlib face detector (ignored by the opencv backend)", type=int, default=1)
+    _ = parser.add_argument("-eye_threshold", help="EAR threshold", type=float, default=0.23)
+    _ = parser.add_argument("-max_frames", help="Maximum number of frames to use (300 with synthetic frames)", type=int, default=None)
+    _ = parser.add_argument("-json", help="Also write the results to this JSON file", type=str, default=None)
+    args = parser.parse_args()
+
+    clip = cast(str | None, args.clip)
+    max_frames = cast(int | None, args.max_frames)
+    if clip is None and max_frames is None:
+        max_frames = 300
+    threshold = cast(float, args.eye_threshold)
+    output: dict[str, Any] = {"clip": clip, "environment": environment_info()}
+
+    if cast(bool, args.stages):
+        stream = FileCameraStream(clip) if clip is not None else SyntheticCameraStream()
+        try:
+            report = benchmark_stages(
+                stream,
+                max_frames if max_frames is not None else sys.maxsize,
+                cast(str, args.backend),
+                threshold,
+                cast(bool, args.tracking),
+                cast(int, args.upsample),
+            )
+        finally:
+            stream.close()
+        output["stages"] = report
+        print(f"frames: {report['frames']}, faces found: {report['faces_found']}, {report['fps']:.1f} frames/s")
+        for stage, summary in report["stages"].items():
+            print(
+                f"{stage:>12}: p50 {summary['p50_ms']:.2f}ms p95 {summary['p95_ms']:.2f}ms "
+                f"p99 {summary['p99_ms']:.2f}ms mean {summary['mean_ms']:.2f}ms"
+            )
+        memory = report["memory_mb"]
+        print(f"memory: start {memory['start']:.1f}MB, after first frame {memory['after_first_frame']:.1f}MB, peak {memory['peak']:.1f}MB")
+    else:
+        if clip is not None:
+            frames = load_grayscale_frames(clip, max_frames)
+        else:
+            synthetic = SyntheticCameraStream()
+            frames = [synthetic.next_grayscale() for _ in range(cast(int, max_frames))]
+        print(f"frames: {len(frames)}")
+        if args.backends is not None:
+            output["backends"] = benchmark_backends(
+                frames, cast(list[str], args.backends), threshold, cast(int, args.upsample)
+            )
+            for report in output["backends"]:
+                print(
+                    f"{report['backend']}: "
+                    f"{report['fps']:.1f} frames/s, "
+                    f"latency p50 {cast(float, report['latency_p50']) * 1000:.1f}ms p95 {cast(float, report['latency_p95']) * 1000:.1f}ms, "
+                    f"EAR deviation mean {report['ear_mean_abs_deviation']:.4f} max {report['ear_max_abs_deviation']:.4f}, "
+                    f"face agreement {report['face_agreement']:.1%}, "
+                    f"label agreement {report['label_agreement']:.1%}"
+                )
+        else:
+            output["scales"] = benchmark_detection_scale(
+                frames, cast(list[float], args.scales), cast(int, args.upsample), threshold
+            )
+            for report in output["scales"]:
+                print(
+                    f"scale {report['scale']:.2f} upsample {report['upsample']}: "
+                    f"{report['fps']:.1f} frames/s, "
+                    f"EAR deviation mean {report['ear_mean_abs_deviation']:.4f} max {report['ear_max_abs_deviation']:.4f}, "
+                    f"face agreement {report['face_agreement']:.1%}"
+                )
+
+    if args.json is not None:
+        with open(cast(str, args.json), "w") as f:
+            json.dump(output, f, indent=2)
@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Any, Optional
+import json
+import numpy as np
+
+
+class EarHistogram:
+    """
+    Streaming quantile sketch of the EAR: a fixed histogram over [0, max_ear],
+    so memory is bounded regardless of the number of samples.
+
+    Parameters
+    ----------
+    bins : int
+        Number of bins, the resolution of the quantiles is max_ear / bins.
+    max_ear : float
+        Upper bound of the histogram, higher values fall in the last bin.
+    """
+
+    def __init__(self, bins: int = 120, max_ear: float = 0.6):
+        self.max_ear = max_ear
+        self.counts = np.zeros(int(bins), dtype=np.int64)
+
+    @property
+    def samples(self) -> int:
+        return int(self.counts.sum())
+
+    def add(self, ear: float):
+        """Add a sample (NaN values are ignored)."""
+        if np.isnan(ear):
+            return
+        i = int(ear / self.max_ear * len(self.counts))
+        self.counts[min(max(i, 0), len(self.counts) - 1)] += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-th quantile (q is clamped to [0, 1]), interpolating linearly within bins.
+        q = 0 gives the lower edge of the first bin holding a sample. NaN if empty.
+        """
+        total = self.counts.sum()
+        if total == 0:
+            return float("nan")
+        cumulative = np.cumsum(self.counts)
+        target = min(max(q, 0.0), 1.0) * total
+        # with target 0 the search must skip the empty bins at the start (their cumulative count is 0 too)
+        i = int(np.searchsorted(cumulative, target, side="left" if target > 0 else "right"))
+        i = min(i, len(self.counts) - 1)
+        before = cumulative[i - 1] if i > 0 else 0
+        fraction = (target - before) / self.counts[i] if self.counts[i] > 0 else 0.0
+        bin_width = self.max_ear / len(self.counts)
+        return float((i + min(max(fraction, 0.0), 1.0)) * bin_width)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"max_ear": self.max_ear, "counts": self.counts.tolist()}
+
+    @staticmethod
+    def from_dict(d: dict[str, Any]) -> "EarHistogram":
+        histogram = EarHistogram(len(d["counts"]), float(d["max_ear"]))
+        histogram.counts[:] = d["counts"]
+        return histogram
+
+
+class DriverProfile:
+    """
+    Calibrated EAR threshold of a driver, persisted as JSON so that it can be
+    reused from the start of the next drive.
+    """
+
+    def __init__(self, name: str, eye_threshold: float, open_ear: float, histogram: EarHistogram):
+        self.name = name
+        self.eye_threshold = eye_threshold
+        """EAR under which the eyes of the driver are considered closed"""
+        self.open_ear = open_ear
+        """Median EAR of the driver during calibration"""
+        self.histogram = histogram
+        """EAR distribution collected during calibration"""
+
+    def save(self, path: str | Path):
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with open(p, "w") as f:
+            json.dump(
+                {
+                    "name": self.name,
+                    "eye_threshold": self.eye_threshold,
+                    "open_ear": self.open_ear,
+                    "histogram": self.histogram.to_dict(),
+                },
+                f,
+                indent=2,
+            )
+
+    @staticmethod
+    def load(path: str | Path) -> Optional["DriverProfile"]:
+        """Load the profile stored at path, None if it doesn't exist."""
+        p = Path(path)
+        if not p.exists():
+            return None
+        with open(p) as f:
+            d = json.load(f)
+        return DriverProfile(
+            name=d["name"],
+            eye_threshold=float(d["eye_threshold"]),
+            open_ear=float(d["open_ear"]),
+            histogram=EarHistogram.from_dict(d["histogram"]),
+        )
+
+
+class ThresholdCalibrator:
+    """
+    Learns the EAR threshold of a driver from the EAR distribution observed while
+    they are assumed to be attentive (ex: the first minutes of driving).
+
+    The threshold is a fraction of the median EAR (blinks don't move the median),
+    clamped to a sane range.
+
+    Parameters
+    ----------
+    duration : float
+        Seconds of frames with a face needed to complete the calibration.
+    min_samples : int
+        Minimum number of frames with a face needed to complete the calibration.
+    closed_ratio : float
+        Fraction of the median EAR under which eyes are considered closed.
+    min_threshold, max_threshold : float
+        Range of the calibrated threshold.
+    """
+
+    def __init__(
+        self,
+        duration: float = 120,
+        min_samples: int = 300,
+        closed_ratio: float = 0.75,
+        min_threshold: float = 0.12,
+        max_threshold: float = 0.32,
+    ):
+        self.duration = duration
+        self.min_samples = min_samples
+        self.closed_ratio = closed_ratio
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.histogram = EarHistogram()
+        self.observed_time = 0.0
+
+    def add(self, ear: float, weight: float):
+        """Add the EAR of a frame with a face, weight is the time (seconds) it accounts for."""
+        if np.isnan(ear):
+            return
+        self.histogram.add(ear)
+        self.observed_time += weight
+
+    @property
+    def is_complete(self) -> bool:
+        return self.observed_time >= self.duration and self.histogram.samples >= self.min_samples
+
+    def profile(self, name: str) -> DriverProfile:
+        """Build the profile of the driver from the samples collected so far."""
+        open_ear = self.histogram.quantile(0.5)
+        threshold = float(np.clip(self.closed_ratio * open_ear, self.min_threshold, self.max_threshold))
+        return DriverProfile(name, threshold, open_ear, self.histogram)
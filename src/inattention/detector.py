@@ -1,8 +1,12 @@
-from .utils import EyeStateDetector, CameraStream
-from threading import Lock, Thread
+from .utils import ClassificationResult, EyeStateDetector, CameraStream
+from .pool import InattentionProcessPool
+from .drowsiness import DrowsinessMetrics, DrowsinessReport
+from pathlib import Path
+from threading import Condition, Lock, Thread
 from typing import Optional
 import logging
 import queue
+import time
 import numpy as np
 import cv2
 
@@ -13,7 +17,17 @@ class InattentionDetector:
     based on eye state predictions from frames captured by a CameraStream.
     """
 
-    def __init__(self, cam_stream: "CameraStream", eye_threshold: float = 0.15):
+    def __init__(
+        self,
+        cam_stream: "CameraStream",
+        eye_threshold: float = 0.15,
+        face_tracking: bool = True,
+        face_detection_scale: float = 1.0,
+        face_detection_upsample: int = 1,
+        background_capture: bool = True,
+        pool: Optional[InattentionProcessPool] = None,
+        face_backend: str = "dlib",
+    ):
         """
         Parameters
         ----------
@@ -22,14 +36,49 @@ class InattentionDetector:
         eye_threshold : float
             Threshold parameter passed to EyeStateDetector (e.g., for
             determining if eyes are open or closed).
+        face_tracking : bool
+            If True, faces are tracked between frames and the full face
+            detector only runs periodically or when tracking is lost.
+        face_detection_scale : float
+            Scale factor applied to the frames before detecting faces (landmarks
+            are still computed on the full resolution frame).
+        face_detection_upsample : int
+            Number of times the frame is upsampled by the face detector.
+        background_capture : bool
+            If True, frames are continuously captured by a background thread
+            (see ThreadedCameraStream) so that each detection uses the freshest
+            frame without waiting for the camera.
+        pool : InattentionProcessPool, optional
+            If given, detection runs on this pool of worker processes instead
+            of the background thread, results are still applied in capture
+            order. The detector starts the pool and closes it when closed, the
+            face tracking, detection and backend parameters are the ones the
+            pool was created with.
+        face_backend : str
+            Backend computing the eye landmarks (see LANDMARK_BACKENDS).
         """
-        self.cam = cam_stream
-        self.detector = EyeStateDetector(eye_threshold)
+        self._eye_threshold = eye_threshold
+        self._pool = pool
+        self.detector: Optional[EyeStateDetector] = None
+        if self._pool is not None:
+            self._pool.start(self._publish)
+        else:
+            self.detector = EyeStateDetector(
+                threshold=eye_threshold,
+                tracking=face_tracking,
+                detection_scale=face_detection_scale,
+                upsample=face_detection_upsample,
+                backend=face_backend,
+            )
+        self.cam = ThreadedCameraStream(cam_stream) if background_capture else cam_stream
 
         self._queue: queue.Queue = queue.Queue(maxsize=1)
 
         # Internal state flags
         self._is_inattent: bool = False   # Latest detection result
+        self._mean_latency: Optional[float] = None  # Exponential moving average of the latency
+        self.history = DetectionHistory()  # Per frame records, written only by _publish
+        self._metrics = DrowsinessMetrics()  # Drowsiness metrics, updated under the lock
         self._lock = Lock()               # Lock for synchronizing thread-safe state updates
 
         # Worker thread
@@ -47,21 +96,41 @@ class InattentionDetector:
                 continue  # check running flag again
 
             try:
-                img_gray = self.cam.next_grayscale()
-                results = self.detector.predict(img_gray)
-
-                # Default: driver is not attentive
-                is_inattent = True
-                for detection in results:
-                    if detection.label == 1:  
-                        is_inattent = False
-
-                with self._lock:
-                    self._is_inattent = is_inattent
+                img_gray, capture_ts = self.cam.next_grayscale_with_timestamp()
+                if self._pool is not None:
+                    # Frames are dropped while all the workers are busy
+                    _ = self._pool.submit(img_gray, capture_ts)
+                else:
+                    assert self.detector is not None
+                    self._publish(self.detector.predict(img_gray), capture_ts)
 
             finally:
                 self._queue.task_done()
 
+    def _publish(self, results: list[ClassificationResult], capture_ts: float):
+        """Update the detection state with the results computed on the frame captured at capture_ts."""
+        # Default: driver is not attentive
+        is_inattent = True
+        for detection in results:
+            # Classified here against the current threshold, which may have been
+            # changed after the results were computed (ex: by the worker processes)
+            if detection.ear >= self._eye_threshold:
+                is_inattent = False
+
+        ear = max((float(d.ear) for d in results), default=float("nan"))
+        face_found = len(results) > 0
+        self.history.write(capture_ts, ear, 0 if is_inattent else 1, face_found)
+
+        latency = time.monotonic() - capture_ts
+        with self._lock:
+            self._metrics.update(capture_ts, ear, face_found, closed=is_inattent)
+            self._is_inattent = is_inattent
+            self._mean_latency = (
+                latency
+                if self._mean_latency is None
+                else 0.9 * self._mean_latency + 0.1 * latency
+            )
+
     def detect(self) -> bool:
         """
         Run an asynchronous detection if not already in progress.
@@ -75,7 +144,10 @@ class InattentionDetector:
         -----
         - If called while detection is ongoing, it will simply return the last
           available result.
+        - Raises InattentionWorkerError if a worker process of the pool failed.
         """
+        if self._pool is not None:
+            self._pool.check()
 
         if self._queue.empty():
             try:
@@ -86,16 +158,50 @@ class InattentionDetector:
         with self._lock:
             return self._is_inattent
 
+    @property
+    def eye_threshold(self) -> float:
+        """EAR under which the eyes are considered closed."""
+        return self._eye_threshold
+
+    @eye_threshold.setter
+    def eye_threshold(self, threshold: float):
+        self._eye_threshold = threshold
+        if self.detector is not None:
+            self.detector.classifier.threshold = threshold
+
+    @property
+    def inattention_score(self) -> float:
+        """Inattention score of the driver from 0 (attentive) to 1 (inattentive), see DrowsinessMetrics.score."""
+        with self._lock:
+            return self._metrics.score
+
+    def drowsiness_report(self) -> DrowsinessReport:
+        """Drowsiness metrics (PERCLOS, blinks, EAR statistics) over the latest minute."""
+        with self._lock:
+            return self._metrics.report()
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        """Exponential moving average of the capture to verdict latency in seconds (None until the first verdict)."""
+        with self._lock:
+            return self._mean_latency
+
     def close(self):
-        """Stop the worker thread gracefully."""
+        """Stop the worker thread (and the worker processes) gracefully."""
         self.cam.close()
         self._running = False
         self._thread.join(timeout=1.0)
+        if self._pool is not None:
+            self._pool.close()
 
 class WebcamCameraStream(CameraStream):
     """
     Webcam camera stream using OpenCV.
 
+    Frames are read into preallocated buffers and converted to grayscale with
+    ``dst=``, so that acquiring a frame doesn't allocate new arrays. The arrays
+    returned by next and next_grayscale are reused by the following call.
+
     Parameters
     ----------
     device : int
@@ -104,6 +210,11 @@ class WebcamCameraStream(CameraStream):
         If provided, attempt to set capture resolution.
     flip : bool
         If True, flip the frame horizontally (useful for webcams).
+    gray_capture : bool
+        If True, request a grayscale (GREY) or YUYV format from the capture
+        backend and take the Y plane as the grayscale frame, instead of
+        converting the BGR frames. Falls back to converting BGR frames if the
+        backend doesn't support it.
     """
 
     def __init__(
@@ -112,11 +223,20 @@ class WebcamCameraStream(CameraStream):
         width: Optional[int] = None,
         height: Optional[int] = None,
         flip: bool = False,
+        gray_capture: bool = False,
     ):
         self.device = device
         self.flip = flip
         self.logger = logging.getLogger(__name__)
         self._default_frame = np.zeros((100, 100, 3), np.uint8)
+        self._default_gray = np.zeros((100, 100), np.uint8)
+
+        # Reused buffers
+        self._frame: Optional[np.ndarray] = None    # capture buffer
+        self._gray: Optional[np.ndarray] = None     # grayscale conversion
+        self._bgr: Optional[np.ndarray] = None      # color conversion (gray capture only)
+        self._flipped: Optional[np.ndarray] = None  # flipped output
+        self._gray_format: Optional[str] = None     # "gray" or "yuyv" if the backend provides the Y plane
 
         self._cap: Optional[cv2.VideoCapture] = cv2.VideoCapture(self.device)
         if not self._cap.isOpened():
@@ -130,6 +250,62 @@ class WebcamCameraStream(CameraStream):
         if height is not None:
             self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, int(height))
 
+        if gray_capture:
+            self._request_gray_format()
+
+    def _frame_size(self) -> tuple[int, int]:
+        assert self._cap is not None
+        return int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+
+    def _request_gray_format(self):
+        """Try to make the backend return raw grayscale or YUYV frames, whose Y plane is the grayscale image."""
+        assert self._cap is not None
+        for fourcc in ("GREY", "YUYV"):
+            self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter.fourcc(*fourcc))
+            self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+            ret, frame = self._cap.read()
+            if not ret or frame is None:
+                continue
+            h, w = self._frame_size()
+            if frame.size == h * w:
+                self._gray_format = "gray"
+            elif frame.size == 2 * h * w and frame.dtype == np.uint8:
+                self._gray_format = "yuyv"
+            else:
+                continue
+            self._frame = frame
+            self.logger.info("Capturing %s frames from camera device %s", fourcc, self.device)
+            return
+        self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        self.logger.warning("Camera device %s doesn't provide grayscale frames, converting BGR ones", self.device)
+
+    def _read(self) -> Optional[np.ndarray]:
+        """Read the next frame into the capture buffer."""
+        if self._cap is None:
+            return None
+        ret, frame = self._cap.read(self._frame)
+        if not ret or frame is None:
+            self.logger.warning("Failed to read frame from camera.")
+            return None
+        self._frame = frame  # a new buffer is only allocated if the frame format changed
+        return frame
+
+    def _to_grayscale(self, frame: np.ndarray) -> np.ndarray:
+        if self._gray_format == "gray":
+            return frame.reshape(self._frame_size())
+        if self._gray_format == "yuyv":
+            h, w = self._frame_size()
+            y_plane = frame.reshape(h, w, 2)[:, :, 0]
+            if self._gray is None or self._gray.shape != (h, w):
+                self._gray = np.empty((h, w), dtype=np.uint8)
+            np.copyto(self._gray, y_plane)
+            return self._gray
+        self._gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return self._gray
+
+    def _flip(self, frame: np.ndarray) -> np.ndarray:
+        self._flipped = cv2.flip(frame, 1, dst=self._flipped if self._flipped is not None and self._flipped.shape == frame.shape else None)
+        return self._flipped
 
     def next(self) -> np.ndarray:
         """
@@ -137,25 +313,26 @@ class WebcamCameraStream(CameraStream):
 
         Returns black frame if frame could not be read.
         """
-        if self._cap is None:
+        frame = self._read()
+        if frame is None:
             return self._default_frame
-        
-        ret, frame = self._cap.read()
 
-        if not ret or frame is None:
-            self.logger.warning("Failed to read frame from camera.")
-            return self._default_frame
-        
+        if self._gray_format is not None:
+            frame = self._bgr = cv2.cvtColor(self._to_grayscale(frame), cv2.COLOR_GRAY2BGR, dst=self._bgr)
         if self.flip:
-            frame = cv2.flip(frame, 1)
+            frame = self._flip(frame)
         return frame
 
     def next_grayscale(self) -> np.ndarray:
         """
         Return the next frame converted to grayscale.
         """
-        color = self.next()
-        gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+        frame = self._read()
+        if frame is None:
+            return self._default_gray
+        gray = self._to_grayscale(frame)
+        if self.flip:
+            gray = self._flip(gray)
         return gray
 
     def close(self) -> None:
@@ -173,3 +350,380 @@ class WebcamCameraStream(CameraStream):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
+
+
+class FileCameraStream(CameraStream):
+    """
+    Camera stream replaying recorded frames, so that the inattention pipeline
+    can run without a camera.
+
+    Parameters
+    ----------
+    path : str
+        A video file, a directory of images (read in lexicographic order) or a
+        ``.npy`` dump of frames shaped (N, H, W) for grayscale frames or
+        (N, H, W, 3) for BGR frames. ``.npy`` dumps are memory-mapped, so frames
+        are neither decoded nor loaded in memory up front.
+    realtime : bool
+        If True frames are delivered at ``fps`` like a live camera would do
+        (frames are skipped if the consumer is slower, calls block until the
+        next frame if it is faster). Otherwise every call returns the following
+        frame as fast as possible.
+    fps : Optional[float]
+        Frame rate used for real-time pacing. Defaults to the video frame rate,
+        or 30 if it is not known.
+    loop : bool
+        If True the stream restarts from the first frame once the end is reached.
+    """
+
+    IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".pgm", ".ppm", ".tif", ".tiff"}
+
+    def __init__(
+        self,
+        path: str,
+        realtime: bool = False,
+        fps: Optional[float] = None,
+        loop: bool = False,
+    ):
+        self.path = Path(path)
+        self.realtime = realtime
+        self.loop = loop
+        self.logger = logging.getLogger(__name__)
+        self._default_frame = np.zeros((100, 100, 3), np.uint8)
+
+        self._cap: Optional[cv2.VideoCapture] = None
+        self._images: list[Path] = []
+        self._frames: Optional[np.ndarray] = None
+        video_fps = 0.0
+
+        if self.path.is_dir():
+            self._images = sorted(
+                p for p in self.path.iterdir() if p.suffix.lower() in self.IMAGE_EXTENSIONS
+            )
+            self.length = len(self._images)
+        elif self.path.suffix.lower() == ".npy":
+            self._frames = np.load(self.path, mmap_mode="r")
+            self.length = self._frames.shape[0]
+        else:
+            self._cap = cv2.VideoCapture(str(self.path))
+            if not self._cap.isOpened():
+                self._cap = None
+                self.logger.warning("Could not open video file %s", self.path)
+                self.length = 0
+            else:
+                self.length = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                video_fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self._video_pos = 0  # index of the next frame returned by the video capture
+
+        self.fps = float(fps) if fps else (video_fps if video_fps > 0 else 30.0)
+        self._start_time: Optional[float] = None
+        self._last_index = -1
+        self.exhausted = False
+        """True once the last frame has been returned (and loop is disabled)."""
+
+    def _next_index(self) -> int:
+        """Index of the frame to return, according to the pacing mode."""
+        if not self.realtime:
+            return self._last_index + 1
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+        index = int((now - self._start_time) * self.fps)
+        if index <= self._last_index:
+            # like a live camera, wait for the next frame to be available
+            index = self._last_index + 1
+            time.sleep(max(0.0, self._start_time + index / self.fps - now))
+        return index
+
+    def _read(self, index: int) -> Optional[np.ndarray]:
+        """Read the frame at the given index (None if it does not exist)."""
+        if self._frames is not None:
+            return self._frames[index] if index < self.length else None
+        if self._images:
+            return cv2.imread(str(self._images[index])) if index < self.length else None
+        if self._cap is None:
+            return None
+        if index < self._video_pos:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self._video_pos = index
+        while self._video_pos < index:
+            if not self._cap.grab():
+                return None
+            self._video_pos += 1
+        ret, frame = self._cap.read()
+        if not ret or frame is None:
+            return None
+        self._video_pos += 1
+        return frame
+
+    def _next_frame(self) -> np.ndarray:
+        if self.exhausted:
+            return self._default_frame
+        index = self._next_index()
+        frame_index = index % self.length if self.loop and self.length > 0 else index
+        frame = self._read(frame_index)
+        if frame is None and self.loop and frame_index > 0:
+            # the frame count of some videos is not reliable: the video ended earlier
+            self.length = frame_index
+            frame = self._read(0)
+        if frame is None:
+            self.exhausted = True
+            return self._default_frame
+        self._last_index = index
+        return frame
+
+    def next(self) -> np.ndarray:
+        """
+        Return next color frame (BGR) as a numpy ndarray.
+
+        Returns black frame once the stream is exhausted.
+        """
+        frame = self._next_frame()
+        if frame.ndim == 2:
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        return frame
+
+    def next_grayscale(self) -> np.ndarray:
+        """
+        Return the next frame converted to grayscale.
+
+        Grayscale ``.npy`` dumps are returned without any conversion or copy.
+        """
+        frame = self._next_frame()
+        if frame.ndim == 2:
+            return frame
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def close(self) -> None:
+        """Release the video file."""
+        if self._cap is not None:
+            try:
+                self._cap.release()
+            except Exception:
+                pass
+            self._cap = None
+        self._frames = None
+        self.exhausted = True
+
+    # Context manager support
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FrameRingBuffer:
+    """
+    Preallocated ring buffer of frames with their capture timestamps.
+
+    A single producer writes frames in place into the slot following the latest
+    one, while consumers copy the latest frame out. The lock is only held to
+    publish a frame and to copy it out, so the producer never waits for the
+    consumers while writing (with at least 2 slots the slot being written is
+    never the one being read).
+    """
+
+    def __init__(self, capacity: int = 4):
+        self.capacity = max(2, int(capacity))
+        self._frames: Optional[np.ndarray] = None
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._seq = -1  # sequence number of the latest published frame
+        self._lock = Lock()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest frame (-1 if no frame has been written yet)."""
+        return self._seq
+
+    def write(self, frame: np.ndarray, timestamp: float) -> None:
+        """Copy the frame into the next slot and publish it."""
+        frames = self._frames
+        if frames is None or frames.shape[1:] != frame.shape or frames.dtype != frame.dtype:
+            # (re)allocate only when the frame format changes
+            frames = np.empty((self.capacity, *frame.shape), dtype=frame.dtype)
+        slot = (self._seq + 1) % self.capacity
+        np.copyto(frames[slot], frame)
+        with self._lock:
+            self._frames = frames
+            self._timestamps[slot] = timestamp
+            self._seq += 1
+
+    def latest(self, out: Optional[np.ndarray] = None) -> tuple[np.ndarray, float, int]:
+        """
+        Copy the latest frame into ``out`` (allocated if None or of the wrong
+        format) and return it along with its timestamp and sequence number.
+        """
+        with self._lock:
+            if self._frames is None or self._seq < 0:
+                raise RuntimeError("No frame has been written yet")
+            slot = self._seq % self.capacity
+            frame = self._frames[slot]
+            if out is None or out.shape != frame.shape or out.dtype != frame.dtype:
+                out = np.empty_like(frame)
+            np.copyto(out, frame)
+            return out, float(self._timestamps[slot]), self._seq
+
+
+class DetectionRecord:
+    """
+    Outcome of the detection on a single frame.
+
+    ``label`` is 1 if at least one face has open eyes, 0 otherwise, ``ear`` is the
+    highest EAR among the faces found (NaN if ``face_found`` is False).
+    """
+
+    __slots__ = ("capture_ts", "ear", "label", "face_found")
+
+    def __init__(self, capture_ts: float, ear: float, label: int, face_found: bool):
+        self.capture_ts = capture_ts
+        self.ear = ear
+        self.label = label
+        self.face_found = face_found
+
+    def __repr__(self):
+        return f"DetectionRecord(capture_ts={self.capture_ts}, ear={self.ear}, label={self.label}, face_found={self.face_found})"
+
+
+class DetectionHistory:
+    """
+    Preallocated ring buffer of the latest detection records.
+
+    There must be a single writer, readers don't take any lock: a record is
+    written in its slot before the sequence number is advanced, and readers
+    discard the records that may have been overwritten while they were reading.
+    The slot of the oldest record is the one the writer fills next, so readers
+    get at most the latest ``capacity - 1`` records.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of records kept.
+    max_interval : float
+        Maximum time (seconds) a record is considered representative of, when
+        weighting records by the interval from the previous capture. Prevents a
+        single record from accounting for a stall of the detector.
+    """
+
+    def __init__(self, capacity: int = 256, max_interval: float = 0.5):
+        self.capacity = max(2, int(capacity))
+        self.max_interval = max_interval
+        self._capture_ts = np.zeros(self.capacity, dtype=np.float64)
+        self._ear = np.full(self.capacity, np.nan, dtype=np.float32)
+        self._label = np.zeros(self.capacity, dtype=np.int8)
+        self._face_found = np.zeros(self.capacity, dtype=np.bool_)
+        self._seq = 0  # number of records written so far
+
+    @property
+    def seq(self) -> int:
+        """Number of records written so far (the sequence number of the next one)."""
+        return self._seq
+
+    def write(self, capture_ts: float, ear: float, label: int, face_found: bool) -> None:
+        """Append a record (single writer only)."""
+        slot = self._seq % self.capacity
+        self._capture_ts[slot] = capture_ts
+        self._ear[slot] = ear
+        self._label[slot] = label
+        self._face_found[slot] = face_found
+        self._seq += 1  # publish
+
+    def since(self, seq: int) -> tuple[list[DetectionRecord], int]:
+        """
+        Return the records written from sequence number ``seq`` on (the ones that
+        have already been overwritten are skipped) and the sequence number to
+        pass to the next call.
+        """
+        end = self._seq
+        # the slot of record end - capacity may already be being written
+        start = max(seq, end - self.capacity + 1)
+        records = [
+            DetectionRecord(
+                float(self._capture_ts[i % self.capacity]),
+                float(self._ear[i % self.capacity]),
+                int(self._label[i % self.capacity]),
+                bool(self._face_found[i % self.capacity]),
+            )
+            for i in range(start, end)
+        ]
+        # Records overwritten by the writer while copying them are not valid (including
+        # the one in the slot being written, as the writer advances the sequence after it)
+        overwritten = self._seq - self.capacity - start + 1
+        if overwritten > 0:
+            records = records[overwritten:]
+        return records, end
+
+    def weight(self, capture_ts: float, previous_ts: Optional[float]) -> float:
+        """Time (seconds) a record captured at capture_ts accounts for, given the previous capture."""
+        if previous_ts is None:
+            return 0.0
+        return min(max(capture_ts - previous_ts, 0.0), self.max_interval)
+
+
+class ThreadedCameraStream(CameraStream):
+    """
+    Wrap a camera stream reading its grayscale frames from a background thread
+    into a FrameRingBuffer, so that consumers always get the freshest frame
+    without waiting for the capture.
+
+    Parameters
+    ----------
+    stream : CameraStream
+        The stream to read frames from (it will only be used by the capture thread).
+    capacity : int
+        Number of frames held by the ring buffer.
+    max_fps : float
+        Maximum capture rate, it prevents the capture thread from spinning when
+        the wrapped stream returns immediately (ex: the camera could not be opened).
+    """
+
+    def __init__(self, stream: CameraStream, capacity: int = 4, max_fps: float = 60):
+        self.stream = stream
+        self.min_interval = 1.0 / max_fps
+        self._ring = FrameRingBuffer(capacity)
+        self._out: Optional[np.ndarray] = None
+        self._first_frame = Condition()
+
+        self._running = True
+        self._thread = Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self):
+        """Background thread: continuously captures frames into the ring buffer."""
+        while self._running:
+            start = time.monotonic()
+            frame, capture_ts = self.stream.next_grayscale_with_timestamp()
+            self._ring.write(frame, capture_ts)
+            if self._ring.seq == 0:
+                with self._first_frame:
+                    self._first_frame.notify_all()
+            time.sleep(max(0.0, start + self.min_interval - time.monotonic()))
+
+    def next_grayscale_with_timestamp(self) -> tuple[np.ndarray, float]:
+        """
+        Return the freshest grayscale frame along with its capture time.
+
+        It only blocks until the very first frame has been captured. The
+        returned array is reused by the following call.
+        """
+        with self._first_frame:
+            self._first_frame.wait_for(lambda: self._ring.seq >= 0 or not self._running)
+        self._out, capture_ts, _ = self._ring.latest(self._out)
+        return self._out, capture_ts
+
+    def next_grayscale(self) -> np.ndarray:
+        """Return the freshest frame in grayscale (reused by the following call)."""
+        frame, _ = self.next_grayscale_with_timestamp()
+        return frame
+
+    def next(self) -> np.ndarray:
+        """Return the freshest frame (only grayscale frames are captured, so it is converted to BGR)."""
+        return cv2.cvtColor(self.next_grayscale(), cv2.COLOR_GRAY2BGR)
+
+    def close(self) -> None:
+        """Stop the capture thread and close the wrapped stream."""
+        self._running = False
+        with self._first_frame:
+            self._first_frame.notify_all()
+        self._thread.join(timeout=1.0)
+        self.stream.close()
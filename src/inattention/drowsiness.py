@@ -0,0 +1,261 @@
+from typing import Optional
+import numpy as np
+
+
+class DrowsinessReport:
+    """
+    Drowsiness metrics computed over the window of a DrowsinessMetrics.
+    """
+
+    __slots__ = (
+        "perclos",
+        "blink_rate",
+        "mean_blink_duration",
+        "ear_mean",
+        "ear_std",
+        "closure_duration",
+        "face_missing_fraction",
+        "score",
+    )
+
+    def __init__(
+        self,
+        perclos: float,
+        blink_rate: float,
+        mean_blink_duration: float,
+        ear_mean: float,
+        ear_std: float,
+        closure_duration: float,
+        face_missing_fraction: float,
+        score: float,
+    ):
+        self.perclos = perclos
+        """Fraction of time (with a face in view) in which the eyes were closed"""
+        self.blink_rate = blink_rate
+        """Blinks per minute"""
+        self.mean_blink_duration = mean_blink_duration
+        """Mean duration (seconds) of the blinks in the window (NaN if there were none)"""
+        self.ear_mean = ear_mean
+        """Mean EAR of the frames with a face (NaN if there were none)"""
+        self.ear_std = ear_std
+        """Standard deviation of the EAR of the frames with a face (NaN if there were none)"""
+        self.closure_duration = closure_duration
+        """Duration (seconds) of the ongoing eye closure (0 if the eyes are open)"""
+        self.face_missing_fraction = face_missing_fraction
+        """Fraction of time in which no face was found"""
+        self.score = score
+        """Inattention score, from 0 (attentive) to 1 (inattentive), see DrowsinessMetrics.score"""
+
+    def __repr__(self):
+        return "DrowsinessReport(" + ", ".join(f"{k}={getattr(self, k):.3f}" for k in self.__slots__) + ")"
+
+
+class DrowsinessMetrics:
+    """
+    Streaming drowsiness metrics (PERCLOS, blink frequency and duration, EAR
+    moving statistics) over a sliding time window of frames.
+
+    Frames are kept in fixed-size circular arrays along with running sums, so
+    every update costs O(1) (amortized over the evicted frames). Each frame is
+    weighted by the time elapsed from the previous one, which keeps the metrics
+    meaningful when frames are processed at a low or irregular rate.
+
+    Parameters
+    ----------
+    window : float
+        Length (seconds) of the sliding window.
+    capacity : int
+        Maximum number of frames in the window, older frames are evicted when it
+        is reached.
+    blink_capacity : int
+        Maximum number of blinks kept in the window.
+    max_interval : float
+        Maximum time (seconds) a single frame is considered representative of.
+    perclos_limit : float
+        PERCLOS at which the driver is considered fully drowsy.
+    long_closure : float
+        Duration (seconds) of an ongoing eye closure at which the driver is
+        considered fully inattentive.
+    long_blink : float
+        Mean blink duration (seconds) at which the driver is considered fully
+        drowsy.
+    face_missing_limit : float
+        Fraction of time without a face in view at which the driver is
+        considered fully inattentive (looking away from the road).
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        capacity: int = 3600,
+        blink_capacity: int = 256,
+        max_interval: float = 0.5,
+        perclos_limit: float = 0.15,
+        long_closure: float = 1.5,
+        long_blink: float = 0.4,
+        face_missing_limit: float = 0.5,
+    ):
+        self.window = window
+        self.max_interval = max_interval
+        self.perclos_limit = perclos_limit
+        self.long_closure = long_closure
+        self.long_blink = long_blink
+        self.face_missing_limit = face_missing_limit
+
+        # frames ring
+        self.capacity = max(1, int(capacity))
+        self._ts = np.zeros(self.capacity, dtype=np.float64)
+        self._weight = np.zeros(self.capacity, dtype=np.float64)
+        self._ear = np.zeros(self.capacity, dtype=np.float64)
+        self._closed = np.zeros(self.capacity, dtype=np.bool_)
+        self._face = np.zeros(self.capacity, dtype=np.bool_)
+        self._head = 0  # index of the oldest frame
+        self._count = 0
+
+        # blinks ring (end timestamp and duration)
+        self.blink_capacity = max(1, int(blink_capacity))
+        self._blink_end = np.zeros(self.blink_capacity, dtype=np.float64)
+        self._blink_duration = np.zeros(self.blink_capacity, dtype=np.float64)
+        self._blink_head = 0
+        self._blink_count = 0
+
+        # running sums over the frames in the window
+        self._total_time = 0.0
+        self._face_time = 0.0
+        self._closed_time = 0.0
+        self._ear_sum = 0.0
+        self._ear_sq_sum = 0.0
+        self._ear_count = 0
+        self._blink_duration_sum = 0.0
+
+        self._last_ts: Optional[float] = None
+        self._closure_start: Optional[float] = None
+
+    def _evict_frame(self):
+        i = self._head
+        w = self._weight[i]
+        self._total_time -= w
+        if self._face[i]:
+            self._face_time -= w
+            if self._closed[i]:
+                self._closed_time -= w
+            self._ear_sum -= self._ear[i]
+            self._ear_sq_sum -= self._ear[i] ** 2
+            self._ear_count -= 1
+        self._head = (self._head + 1) % self.capacity
+        self._count -= 1
+
+    def _evict_blink(self):
+        self._blink_duration_sum -= self._blink_duration[self._blink_head]
+        self._blink_head = (self._blink_head + 1) % self.blink_capacity
+        self._blink_count -= 1
+
+    def _add_blink(self, end_ts: float, duration: float):
+        if self._blink_count == self.blink_capacity:
+            self._evict_blink()
+        i = (self._blink_head + self._blink_count) % self.blink_capacity
+        self._blink_end[i] = end_ts
+        self._blink_duration[i] = duration
+        self._blink_duration_sum += duration
+        self._blink_count += 1
+
+    def update(self, ts: float, ear: float, face_found: bool, closed: bool):
+        """
+        Add the outcome of the detection on a frame captured at ts (seconds).
+        Frames not newer than the previous one are ignored.
+        """
+        if self._last_ts is not None and ts <= self._last_ts:
+            return
+        weight = 0.0 if self._last_ts is None else min(ts - self._last_ts, self.max_interval)
+        self._last_ts = ts
+
+        # evict the frames and the blinks that are out of the window
+        while self._count > 0 and (self._count == self.capacity or self._ts[self._head] < ts - self.window):
+            self._evict_frame()
+        oldest_ts = self._ts[self._head] if self._count > 0 else ts
+        while self._blink_count > 0 and self._blink_end[self._blink_head] < oldest_ts:
+            self._evict_blink()
+
+        i = (self._head + self._count) % self.capacity
+        self._ts[i] = ts
+        self._weight[i] = weight
+        self._face[i] = face_found
+        self._closed[i] = face_found and closed
+        self._ear[i] = ear if face_found else 0.0
+        self._count += 1
+        self._total_time += weight
+        if face_found:
+            self._face_time += weight
+            if closed:
+                self._closed_time += weight
+            self._ear_sum += ear
+            self._ear_sq_sum += ear**2
+            self._ear_count += 1
+
+            # blinks go from the first closed frame to the first open one
+            if closed and self._closure_start is None:
+                self._closure_start = ts
+            elif not closed and self._closure_start is not None:
+                self._add_blink(ts, ts - self._closure_start)
+                self._closure_start = None
+
+    @property
+    def perclos(self) -> float:
+        return max(self._closed_time, 0.0) / self._face_time if self._face_time > 0 else 0.0
+
+    @property
+    def closure_duration(self) -> float:
+        if self._closure_start is None or self._last_ts is None:
+            return 0.0
+        return self._last_ts - self._closure_start
+
+    @property
+    def face_missing_fraction(self) -> float:
+        if self._total_time <= 0:
+            return 0.0
+        return max(self._total_time - self._face_time, 0.0) / self._total_time
+
+    @property
+    def blink_rate(self) -> float:
+        """Blinks per minute over the time covered by the window"""
+        return 60.0 * self._blink_count / self._total_time if self._total_time > 0 else 0.0
+
+    @property
+    def mean_blink_duration(self) -> float:
+        return self._blink_duration_sum / self._blink_count if self._blink_count > 0 else float("nan")
+
+    @property
+    def score(self) -> float:
+        """
+        Inattention score, from 0 (attentive) to 1 (inattentive).
+
+        It is the highest among PERCLOS, ongoing eye closure duration, mean blink
+        duration and time without a face in view, each one relative to the limit at
+        which the driver is considered fully inattentive.
+        """
+        terms = [
+            self.perclos / self.perclos_limit,
+            self.closure_duration / self.long_closure,
+            self.face_missing_fraction / self.face_missing_limit,
+        ]
+        if self._blink_count > 0:
+            terms.append(self.mean_blink_duration / self.long_blink)
+        return float(min(max(terms), 1.0))
+
+    def report(self) -> DrowsinessReport:
+        """Compute all the metrics over the current window."""
+        if self._ear_count > 0:
+            ear_mean = self._ear_sum / self._ear_count
+            ear_std = float(np.sqrt(max(self._ear_sq_sum / self._ear_count - ear_mean**2, 0.0)))
+        else:
+            ear_mean = ear_std = float("nan")
+        return DrowsinessReport(
+            perclos=self.perclos,
+            blink_rate=self.blink_rate,
+            mean_blink_duration=self.mean_blink_duration,
+            ear_mean=ear_mean,
+            ear_std=ear_std,
+            closure_duration=self.closure_duration,
+            face_missing_fraction=self.face_missing_fraction,
+            score=self.score,
+        )
@@ -0,0 +1,44 @@
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Optional
+import time
+
+SHAPE_PREDICTOR_PATH = Path(__file__).parent.absolute().joinpath('model/shape_predictor_68_face_landmarks.dat')
+
+class ModelRegistry():
+    """Process-wide registry of the models used by the eye detectors, so that each model is loaded once and shared.
+
+    Models are loaded lazily on first use, or in background by warm_up (ex: while connecting to the simulator).
+    Worker processes created with fork after the model is loaded share its memory with the parent.
+    """
+    def __init__(self, shape_predictor_path=SHAPE_PREDICTOR_PATH):
+        self.shape_predictor_path = Path(shape_predictor_path)
+        self._shape_predictor = None
+        self._lock = Lock()
+        self._warm_up_thread: Optional[Thread] = None
+        self.load_time: Optional[float] = None
+        """Seconds taken to load the shape predictor (None if not loaded yet)"""
+
+    def shape_predictor(self):
+        """Return the 68 facial landmark predictor, loading it if needed (or waiting for the warm up to load it)."""
+        if self._shape_predictor is None:
+            with self._lock:
+                if self._shape_predictor is None:
+                    # imported here so that the other backends don't require dlib
+                    import dlib
+                    start = time.perf_counter()
+                    predictor = dlib.shape_predictor(str(self.shape_predictor_path))
+                    self.load_time = time.perf_counter() - start
+                    self._shape_predictor = predictor
+        return self._shape_predictor
+
+    def warm_up(self) -> Thread:
+        """Start loading the models in a background thread (only once). Returns the loading thread."""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = Thread(target=self.shape_predictor, daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+models = ModelRegistry()
+"""The registry shared by all the detectors of the process"""
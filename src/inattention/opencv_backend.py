@@ -0,0 +1,70 @@
+from pathlib import Path
+import numpy as np
+import cv2
+
+MODEL_DIR = Path(__file__).parent.absolute().joinpath('model')
+YUNET_MODEL_PATH = MODEL_DIR.joinpath('face_detection_yunet_2023mar.onnx')
+LBF_MODEL_PATH = MODEL_DIR.joinpath('lbfmodel.yaml')
+
+# indices of the eye landmarks in the 68 points annotation (left eye, then right eye)
+EYE_POINTS = list(range(36, 48))
+
+class OpenCVLandmarkBackend():
+    """Eye landmark backend based on OpenCV only (CPU, multi-threaded inference).
+
+    Faces are detected with the YuNet DNN (cv2.FaceDetectorYN) and the 68 facial landmarks are computed by the LBF
+    facemark (cv2.face, from the opencv-contrib-python package), which uses the same annotation as the dlib predictor.
+
+    Models can be downloaded from:
+    - YuNet: https://github.com/opencv/opencv_zoo/tree/main/models/face_detection_yunet
+    - LBF: https://github.com/kurnianggoro/GSOC2017/blob/master/data/lbfmodel.yaml
+    """
+    def __init__(self, face_model_path=YUNET_MODEL_PATH, landmark_model_path=LBF_MODEL_PATH, detection_scale=1.0,
+                 score_threshold=0.7, threads=None):
+        if not hasattr(cv2, 'face'):
+            raise RuntimeError('The OpenCV landmark backend requires the contrib modules (pip install opencv-contrib-python)')
+        for path in (face_model_path, landmark_model_path):
+            if not Path(path).exists():
+                raise FileNotFoundError(f'Missing model for the OpenCV landmark backend: {path}')
+        if threads is not None:
+            cv2.setNumThreads(threads)
+        self.detection_scale = detection_scale
+        self.face_detector = cv2.FaceDetectorYN.create(str(face_model_path), '', (0, 0), score_threshold)
+        self.facemark = cv2.face.createFacemarkLBF()
+        self.facemark.loadModel(str(landmark_model_path))
+        self._input_size = None
+        self._bgr = None  # reused 3 channels input of the face detector
+
+    def detect_faces(self, gray_img):
+        """Detect the faces, returns an int32 array of (x, y, w, h) rectangles in full resolution coordinates."""
+        if self.detection_scale == 1.0:
+            small_img = gray_img
+        else:
+            small_img = cv2.resize(gray_img, None, fx=self.detection_scale, fy=self.detection_scale, interpolation=cv2.INTER_AREA)
+        # YuNet expects a 3 channels image
+        self._bgr = cv2.cvtColor(small_img, cv2.COLOR_GRAY2BGR, dst=self._bgr)
+        h, w = small_img.shape[:2]
+        if self._input_size != (w, h):
+            self.face_detector.setInputSize((w, h))
+            self._input_size = (w, h)
+        _, faces = self.face_detector.detect(self._bgr)
+        if faces is None:
+            return np.empty((0, 4), dtype=np.int32)
+        return (faces[:, :4] / self.detection_scale).astype(np.int32)
+
+    def detect_landmarks(self, gray_img):
+        """Detect the eye landmarks for all faces. The image must be grayscale.
+
+        Returns a float32 array of shape (faces, 12, 2): the (x, y) coordinates of the left eye followed by the right eye.
+        """
+        return self.landmarks(gray_img, self.detect_faces(gray_img))
+
+    def landmarks(self, gray_img, rects):
+        """Compute the eye landmarks of the faces in the given (x, y, w, h) rectangles, as an array of shape (faces, 12, 2).
+        """
+        if len(rects) == 0:
+            return np.empty((0, len(EYE_POINTS), 2), dtype=np.float32)
+        ok, shapes = self.facemark.fit(gray_img, rects)
+        if not ok:
+            return np.empty((0, len(EYE_POINTS), 2), dtype=np.float32)
+        return np.stack([s.reshape(-1, 2)[EYE_POINTS] for s in shapes]).astype(np.float32)
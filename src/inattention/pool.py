@@ -0,0 +1,222 @@
+from .models import models
+from .utils import ClassificationResult, EyeStateDetector
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock, Thread
+from typing import Any, Callable, Optional
+import multiprocessing
+import queue
+import traceback
+import numpy as np
+
+
+def _worker_main(tasks, results, detector_kwargs: dict[str, Any]):
+    """Entry point of the worker processes: runs the detector on the frames found in shared memory."""
+    detector = EyeStateDetector(**detector_kwargs)
+    segments: dict[str, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, shm_name, shape, dtype = task
+            try:
+                shm = segments.get(shm_name)
+                if shm is None:
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                    segments[shm_name] = shm
+                frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * int(np.prod(shape)) * np.dtype(dtype).itemsize)
+                predictions = detector.predict(frame)
+                del frame
+                results.put((seq, slot, [ClassificationResult(label=p.label, ear=float(p.ear)) for p in predictions], None))
+            except Exception:
+                # sent back to the parent, a failure must not look like a frame without faces
+                results.put((seq, slot, None, traceback.format_exc()))
+    finally:
+        for shm in segments.values():
+            shm.close()
+
+
+class InattentionWorkerError(RuntimeError):
+    """A worker process failed to process a frame, the message carries the worker traceback."""
+
+
+class InattentionProcessPool:
+    """
+    Pool of processes running an EyeStateDetector each, so that detection can use
+    multiple cores instead of sharing the GIL with the rest of the process.
+
+    Frames are handed to the workers through shared memory (one slot per worker)
+    and results are delivered to `on_result` in the same order frames were
+    submitted, that is ordered by capture timestamp.
+
+    Workers are started with the "fork" method (the entry script of the simulation
+    cannot be imported again by "spawn" or "forkserver"). A forked process only
+    keeps the forking thread, so a lock held by any other thread would stay locked
+    forever in the workers: the pool must be created before starting any other
+    thread (model warm up, simulator client, pygame), and it starts its own
+    collector thread only in `start`. The landmark model is loaded before
+    forking, so the workers share it with the parent instead of loading their
+    own copy.
+
+    If a worker fails, its traceback is sent back to the parent: no more results
+    are published and `check` raises an InattentionWorkerError. The same happens
+    when a worker process dies without reporting (ex: a crash in native code or
+    an out of memory kill), as the result of its frame would never arrive.
+
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+    detector_kwargs : dict
+        Keyword arguments used to build the EyeStateDetector of each worker.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        detector_kwargs: Optional[dict[str, Any]] = None,
+    ):
+        self.workers = int(workers)
+        self.on_result: Optional[Callable[[list[ClassificationResult], float], None]] = None
+        # Loaded before forking so that the workers share the parent's copy
+        if (detector_kwargs or {}).get("backend", "dlib") == "dlib":
+            _ = models.shape_predictor()
+        ctx = multiprocessing.get_context("fork")
+        # Workers must share the resource tracker of this process, otherwise each one
+        # would start its own and unlink the shared memory when exiting
+        resource_tracker.ensure_running()
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._processes = [
+            ctx.Process(target=_worker_main, args=(self._tasks, self._results, detector_kwargs or {}), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for p in self._processes:
+            p.start()
+
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._frames: Optional[np.ndarray] = None  # view of the shared memory, one frame per slot
+        self._free_slots = list(range(self.workers))
+        self._lock = Lock()
+
+        # reorder buffer: results are published following the submission order
+        self._timestamps: dict[int, float] = {}
+        self._completed: dict[int, list[ClassificationResult]] = {}
+        self._next_seq = 0     # sequence number of the next submitted frame
+        self._publish_seq = 0  # sequence number of the next result to be published
+
+        self._error: Optional[InattentionWorkerError] = None
+        self._running = False
+        self._collector = Thread(target=self._collect_loop, daemon=True)
+
+    def start(self, on_result: Callable[[list[ClassificationResult], float], None]):
+        """
+        Start accepting frames, `on_result` is called (from the collector thread) with
+        the results of each frame and its capture timestamp.
+        """
+        self.on_result = on_result
+        self._running = True
+        self._collector.start()
+
+    def check(self):
+        """Raise the error of the worker that failed or died, if any."""
+        if self._error is None and self._running:
+            error = self._dead_worker_error()
+            if error is not None:
+                self._fail(error)
+        if self._error is not None:
+            raise self._error
+
+    def _dead_worker_error(self) -> Optional[InattentionWorkerError]:
+        for p in self._processes:
+            if p.exitcode is not None:
+                return InattentionWorkerError(f"Worker process {p.pid} died (exit code {p.exitcode})")
+        return None
+
+    def _fail(self, error: InattentionWorkerError):
+        """Stop publishing results, `check` raises the (first) error from now on."""
+        with self._lock:
+            self._running = False
+            if self._error is not None:
+                return
+            self._error = error
+        print("INATTENTION_POOL: ", error)
+
+    def _allocate(self, frame: np.ndarray):
+        """(Re)allocate the shared memory slots for frames shaped like the given one."""
+        self._release_shm()
+        self._shm = shared_memory.SharedMemory(create=True, size=frame.nbytes * self.workers)
+        self._frames = np.ndarray((self.workers, *frame.shape), dtype=frame.dtype, buffer=self._shm.buf)
+
+    def _release_shm(self):
+        if self._shm is not None:
+            self._frames = None
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+
+    def submit(self, frame: np.ndarray, capture_ts: float) -> bool:
+        """
+        Hand a frame to a free worker without blocking.
+
+        Returns False (and drops the frame) if all the workers are busy.
+        """
+        with self._lock:
+            if not self._running or not self._free_slots:
+                return False
+            if self._frames is None or self._frames.shape[1:] != frame.shape or self._frames.dtype != frame.dtype:
+                if len(self._free_slots) < self.workers:
+                    # wait for the frames in flight before changing the frame format
+                    return False
+                self._allocate(frame)
+            assert self._shm is not None and self._frames is not None
+            slot = self._free_slots.pop()
+            np.copyto(self._frames[slot], frame)
+            seq = self._next_seq
+            self._next_seq += 1
+            self._timestamps[seq] = capture_ts
+            self._tasks.put((seq, slot, self._shm.name, frame.shape, frame.dtype.str))
+            return True
+
+    def _collect_loop(self):
+        """Background thread: collects the results and publishes them in order."""
+        while self._running:
+            dead_worker_error = self._dead_worker_error()
+            if dead_worker_error is not None:
+                self._fail(dead_worker_error)
+                break
+            try:
+                seq, slot, result, error = self._results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if error is not None:
+                self._fail(InattentionWorkerError(f"Worker failed on frame {seq}:\n{error}"))
+                break
+            to_publish = []
+            with self._lock:
+                self._free_slots.append(slot)
+                self._completed[seq] = result
+                while self._publish_seq in self._completed:
+                    to_publish.append((self._completed.pop(self._publish_seq), self._timestamps.pop(self._publish_seq)))
+                    self._publish_seq += 1
+            assert self.on_result is not None
+            for result, capture_ts in to_publish:
+                self.on_result(result, capture_ts)
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        with self._lock:
+            self._running = False
+        for _ in self._processes:
+            self._tasks.put(None)
+        for p in self._processes:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+        if self._collector.is_alive():
+            self._collector.join(timeout=1.0)
+        with self._lock:
+            self._release_shm()
@@ -1,10 +1,33 @@
+import time
+from typing import Protocol
 import numpy as np
 import cv2
-import dlib
-from pathlib import Path
+from .models import models
+
+def eye_aspect_ratios(eyes):
+    """Compute the eye aspect ratio of a batch of eyes. The input has shape (..., 6, 2), the output has shape (...).
+    """
+    eyes = np.asarray(eyes, dtype=np.float32)
+    # distances between the two sets of vertical eye landmarks
+    h1 = np.linalg.norm(eyes[..., 1, :] - eyes[..., 5, :], axis=-1)
+    h2 = np.linalg.norm(eyes[..., 2, :] - eyes[..., 4, :], axis=-1)
+    # distance between the horizontal eye landmarks
+    w = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+    return (h1 + h2) / (2.0 * w)
+
+def face_eye_aspect_ratios(landmarks):
+    """Compute the mean eye aspect ratio of both eyes of a batch of faces.
+
+    The input has shape (..., 12, 2), the 6 landmarks of the left eye followed by the 6 of the right one (as returned by
+    EyeDetector.detect_landmarks), the output has shape (...). Ex: (frames, faces, 12, 2) for scoring recorded sessions,
+    where frames with less faces can be padded with NaN (which results in a NaN EAR).
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    ears = eye_aspect_ratios(landmarks.reshape(*landmarks.shape[:-2], 2, 6, 2))
+    return ears.mean(axis=-1)
 
 class DetectionResult():
-    """Result of the EyeDetector. Contains the landmark's coordinates of both eyes.
+    """Result of the EyeDetector. Contains the landmark's coordinates of both eyes (as arrays of shape (6, 2)).
     """
     def __init__(self, left_eye, right_eye):
         self.left_eye = left_eye
@@ -15,38 +38,150 @@ class DetectionResult():
 
 class EyeDetector():
     """The detector of eye landmarks. Given a grayscale image, computes the 2D points for both eyes of all faces present.
+
+    Faces are detected on the image downscaled by detection_scale (with the given upsample factor of the dlib detector),
+    while landmarks are always computed on the full resolution image to keep the EAR precise.
+
+    When tracking is enabled, once faces are found they are followed with a correlation tracker and the landmarks are
+    computed on the tracked rectangles. The (expensive) face detector runs again only when the tracking confidence drops
+    below min_tracking_confidence, or after redetect_interval frames.
     """
-    def __init__(self):
+    def __init__(self, tracking=False, redetect_interval=10, min_tracking_confidence=7.0, detection_scale=1.0, upsample=1):
+        # imported here so that the other backends don't require dlib
+        import dlib
+        self._dlib = dlib
         # face detector, necessary for landmark detection
         self.face_detector = dlib.get_frontal_face_detector()
-        # 68 facial landmark detector
-        path = Path(__file__).parent.absolute()
-        self.shape_predictor = dlib.shape_predictor(str(path.joinpath('model/shape_predictor_68_face_landmarks.dat')))
+        # 68 facial landmark detector, shared by all the detectors and loaded on first use
+        self._shape_predictor = None
         # these arrays contain the indeces of the keypoints we need
         self.left_eye_points = [36, 37, 38, 39, 40, 41]
         self.right_eye_points = [42, 43, 44, 45, 46, 47]
+        self.eye_points = self.left_eye_points + self.right_eye_points
+        # face detection resolution
+        self.detection_scale = detection_scale
+        self.upsample = upsample
+        # face tracking
+        self.tracking = tracking
+        self.redetect_interval = redetect_interval
+        self.min_tracking_confidence = min_tracking_confidence
+        self._trackers = []
+        self._frames_since_detection = 0
 
-    def detect(self, gray_img):
-        """Detect the landmarks for all faces. The image must be grayscale.
+    @property
+    def shape_predictor(self):
+        """The 68 facial landmark predictor (see ModelRegistry)."""
+        if self._shape_predictor is None:
+            self._shape_predictor = models.shape_predictor()
+        return self._shape_predictor
+
+    def _track_faces(self, gray_img):
+        """Update the face trackers. Returns the tracked rectangles or None if the faces must be detected again.
         """
-        # detect faces in the grayscale image
-        rects = self.face_detector(gray_img, 1)
+        if not self.tracking or not self._trackers or self._frames_since_detection >= self.redetect_interval:
+            return None
+        rects = []
+        for tracker in self._trackers:
+            # the peak-to-sidelobe ratio tells how confident the tracker is about the new position
+            confidence = tracker.update(gray_img)
+            if confidence < self.min_tracking_confidence:
+                return None
+            pos = tracker.get_position()
+            rects.append(self._dlib.rectangle(int(pos.left()), int(pos.top()), int(pos.right()), int(pos.bottom())))
+        return rects
 
-        result = []
+    def _detect_faces(self, gray_img):
+        """Run the face detector on the whole image and (re)start tracking the detected faces.
+        """
+        if self.detection_scale == 1.0:
+            rects = self.face_detector(gray_img, self.upsample)
+        else:
+            small_img = cv2.resize(gray_img, None, fx=self.detection_scale, fy=self.detection_scale, interpolation=cv2.INTER_AREA)
+            # bring the rectangles back to the full resolution image
+            rects = [self._dlib.rectangle(int(r.left() / self.detection_scale), int(r.top() / self.detection_scale),
+                                    int(r.right() / self.detection_scale), int(r.bottom() / self.detection_scale))
+                     for r in self.face_detector(small_img, self.upsample)]
+        if self.tracking:
+            self._trackers = []
+            for rect in rects:
+                tracker = self._dlib.correlation_tracker()
+                tracker.start_track(gray_img, rect)
+                self._trackers.append(tracker)
+        return rects
+
+    def detect_faces(self, gray_img):
+        """Find the faces in the image (following the previous ones if tracking), returns their rectangles.
+        """
+        rects = self._track_faces(gray_img)
+        if rects is None:
+            rects = self._detect_faces(gray_img)
+            self._frames_since_detection = 0
+        else:
+            self._frames_since_detection += 1
+        return rects
+
+    def detect_landmarks(self, gray_img):
+        """Detect the eye landmarks for all faces. The image must be grayscale.
+
+        Returns a float32 array of shape (faces, 12, 2): the (x, y) coordinates of the left eye followed by the right eye.
+        """
+        return self.landmarks(gray_img, self.detect_faces(gray_img))
+
+    def landmarks(self, gray_img, rects):
+        """Compute the eye landmarks of the faces in the given rectangles, as an array of shape (faces, 12, 2).
+        """
+        landmarks = np.empty((len(rects), len(self.eye_points), 2), dtype=np.float32)
         # loop over the face detections
-        for rect in rects:
+        for i, rect in enumerate(rects):
             # determine the facial landmarks for the face region
-            shape = self.shape_predictor(gray_img, rect)
-
+            parts = self.shape_predictor(gray_img, rect).parts()
             # extract the left and right eye coordinates (x, y)
-            left_eye = [(shape.part(p).x, shape.part(p).y) for p in self.left_eye_points]
-            right_eye = [(shape.part(p).x, shape.part(p).y) for p in self.right_eye_points]
+            landmarks[i] = [(parts[p].x, parts[p].y) for p in self.eye_points]
 
-            result.append(DetectionResult(left_eye, right_eye))
+        return landmarks
 
-        return result
+    def detect(self, gray_img):
+        """Detect the landmarks for all faces. The image must be grayscale.
+        """
+        return [DetectionResult(l[:6], l[6:]) for l in self.detect_landmarks(gray_img)]
   
 
+class LandmarkBackend(Protocol):
+    """Source of eye landmarks (ex: EyeDetector with dlib, OpenCVLandmarkBackend).
+
+    detect_landmarks is equivalent to landmarks(gray_img, detect_faces(gray_img)), the two stages are exposed
+    separately in order to measure them.
+    """
+    def detect_landmarks(self, gray_img) -> np.ndarray:
+        """Detect the eye landmarks for all faces in a grayscale image as a float32 array of shape (faces, 12, 2).
+        """
+        ...
+
+    def detect_faces(self, gray_img):
+        """Find the faces in a grayscale image, the result is only meant to be passed to landmarks.
+        """
+        ...
+
+    def landmarks(self, gray_img, faces) -> np.ndarray:
+        """Compute the eye landmarks of the given faces as a float32 array of shape (faces, 12, 2).
+        """
+        ...
+
+LANDMARK_BACKENDS = ['dlib', 'opencv']
+
+def create_landmark_backend(name='dlib', tracking=False, detection_scale=1.0, upsample=1) -> LandmarkBackend:
+    """Build the landmark backend with the given name (one of LANDMARK_BACKENDS).
+
+    tracking and upsample are only supported by the dlib backend.
+    """
+    if name == 'dlib':
+        return EyeDetector(tracking=tracking, detection_scale=detection_scale, upsample=upsample)
+    if name == 'opencv':
+        # imported here since it depends on the OpenCV contrib modules
+        from .opencv_backend import OpenCVLandmarkBackend
+        return OpenCVLandmarkBackend(detection_scale=detection_scale)
+    raise ValueError(f'Unknown landmark backend: {name} (available: {", ".join(LANDMARK_BACKENDS)})')
+
 class ClassificationResult():
     """Result of the EyeClassifier. Contains the label (0=closed or 1=open) and the computed EAR.
     """
@@ -64,39 +199,25 @@ class EyeClassifier():
         # threshold not zero to account for errors
         self.threshold = threshold
 
-    def distance(self, pointA, pointB):
-	    # euclidean distance = norm2
-        Ax, Ay = pointA
-        Bx, By = pointB
-        return np.sqrt((Bx - Ax)**2 + (By - Ay)**2)
-
     def eye_aspect_ratio(self, eye):
         """Compute the eye aspect ratio from the given set of landmarks. The input must be a list of six 2D points.
         """
-        # distances between the two sets of vertical eye landmarks
-        h1 = self.distance(eye[1], eye[5])
-        h2 = self.distance(eye[2], eye[4])
-        # distance between the horizontal eye landmark
-        w = self.distance(eye[0], eye[3])
-        # eye aspect ratio
-        ear = (h1 + h2) / (2.0 * w)
-        return ear
-    
+        return eye_aspect_ratios(eye)
+
+    def classify(self, landmarks):
+        """Classify the eyes of all the faces as closed (0) or open (1). input must be an array of shape (faces, 12, 2).
+        """
+        # compute the mean eye aspect ratio of each face
+        ears = face_eye_aspect_ratios(landmarks)
+        # classify the eyes
+        labels = ears >= self.threshold
+        return [ClassificationResult(label=int(label), ear=ear) for label, ear in zip(labels, ears)]
+
     def predict(self, detection):
         """Classify all the eyes detected as closed (0) or open (1). input must be an array of DetectionResult.
         """
-        result = []
-        for d in detection:
-            # compute the mean eye aspect ratio
-            left_ear = self.eye_aspect_ratio(d.left_eye)
-            right_ear = self.eye_aspect_ratio(d.right_eye)
-            ear = (left_ear + right_ear) / 2.0
-            # classify the eye
-            if ear < self.threshold:
-                result.append(ClassificationResult(label=0, ear=ear))
-            else:
-                result.append(ClassificationResult(label=1, ear=ear))
-        return result
+        landmarks = np.array([np.concatenate((d.left_eye, d.right_eye)) for d in detection], dtype=np.float32)
+        return self.classify(landmarks.reshape(-1, 12, 2))
   
 class EyeStateDetectionResult():
     """Result of the Eye State Detector. Combines detection and classification results.
@@ -110,18 +231,18 @@ class EyeStateDetectionResult():
 class EyeStateDetector():
     """Detect the eye position and whether they are closed or open.
     """
-    def __init__(self, threshold=0.1):
-        self.detector = EyeDetector()
+    def __init__(self, threshold=0.1, tracking=False, detection_scale=1.0, upsample=1, backend='dlib'):
+        self.detector = create_landmark_backend(backend, tracking=tracking, detection_scale=detection_scale, upsample=upsample)
         self.classifier = EyeClassifier(threshold)
 
     def predict(self, gray_img):
         """Detect the eyes position and state in an input image. The image must be grayscale.
         """
         # execute detection and then classification
-        detection_result = self.detector.detect(gray_img)
-        classification_result = self.classifier.predict(detection_result)
+        landmarks = self.detector.detect_landmarks(gray_img)
+        classification_result = self.classifier.classify(landmarks)
 
-        return [EyeStateDetectionResult(d, c) for (d, c) in zip(detection_result, classification_result)]
+        return [EyeStateDetectionResult(DetectionResult(l[:6], l[6:]), c) for (l, c) in zip(landmarks, classification_result)]
     
 ### CAMERA STREAM ###
 
@@ -135,6 +256,11 @@ class CameraStream():
     def next_grayscale(self) -> np.ndarray:
         """Return the next image of the stream, in grayscale, as a numpy array."""
         raise NotImplementedError()
+
+    def next_grayscale_with_timestamp(self) -> tuple[np.ndarray, float]:
+        """Return the next image of the stream, in grayscale, along with its capture time (time.monotonic)."""
+        frame = self.next_grayscale()
+        return frame, time.monotonic()
     
     def close(self) -> None:
         """Close the camera stream."""
\ No newline at end of file
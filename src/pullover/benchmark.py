@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the map topology index (see TopologyIndex) against the linear
+scan of the topology it replaced, on the map currently loaded in the simulator.
+
+Run from the src directory (HOST and PORT select the simulator):
+    python -m pullover.benchmark
+"""
+
+import os
+import time
+
+import carla
+
+from .topology import TopologyIndex
+
+
+def benchmark_topology_index(topology: list[tuple[carla.Waypoint, carla.Waypoint]]) -> dict[str, float]:
+    """
+    Times the index build and the lane continuation lookups of every lane of the topology,
+    with the index and with a linear scan. Returns the timings (seconds) and the number of
+    lookups whose results differ.
+    """
+    queries = [w1 for w1, _ in topology]
+
+    start = time.perf_counter()
+    index = TopologyIndex(topology)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear_results = [
+        next(
+            filter(
+                lambda t: w.road_id == t[0].road_id
+                and w.section_id == t[0].section_id
+                and w.lane_id == t[1].lane_id,
+                topology,
+            ),
+            (None, None),
+        )[1]
+        for w in queries
+    ]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index_results = [index.lane_continuation(w) for w in queries]
+    index_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1
+        for a, b in zip(linear_results, index_results)
+        if (a is None) != (b is None) or (a is not None and b is not None and a.id != b.id)
+    )
+    return {
+        "entries": len(topology),
+        "build": build_time,
+        "linear_lookup": linear_time / max(len(queries), 1),
+        "index_lookup": index_time / max(len(queries), 1),
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    client = carla.Client(os.environ.get("HOST", "localhost"), int(os.environ.get("PORT", "2000")))
+    client.set_timeout(120)  # pyright: ignore[reportUnknownMemberType]
+    report = benchmark_topology_index(client.get_world().get_map().get_topology())
+    print(f"topology entries: {report['entries']}")
+    print(f"index build:      {report['build'] * 1e3:.2f} ms")
+    print(f"linear lookup:    {report['linear_lookup'] * 1e6:.2f} us/lookup")
+    print(f"index lookup:     {report['index_lookup'] * 1e6:.2f} us/lookup")
+    print(f"mismatches:       {report['mismatches']}")
@@ -1,8 +1,11 @@
-import time
 import numpy as np
 import carla
 from typing import cast
-from .utils import to_cartesian_coords
+from .clock import SimulationClock
+from .radar_buffer import RadarFrame, RadarFrameBuffer
+from .spatial_index import PointGrid
+from .utils import inverse_transform_points, to_cartesian_coords, transform_points
+from .verdict_cache import VerdictCache, pose_bucket
 
 class SafePulloverChecker:
     """
@@ -24,16 +27,41 @@ class SafePulloverChecker:
         min_inliers: int = 1,
         safety_delay: float = 0.8, # in seconds: time that should pass before stating its safe
         debug: bool = False,
+        pose_location_step: float = 0.5, # in meters
+        pose_yaw_step: float = 2.0, # in degrees
+        accumulated_frames: int = 4,
+        accumulation_time: float = 0.2, # in seconds of simulation
+        clock: SimulationClock | None = None,
+        grid_cell_size: float = 2.0, # in meters
     ):
         self.scanned_area_x_offset = float(scanned_area_x_offset)
         self.min_inliers = int(min_inliers)
         self.safety_delay = float(safety_delay)
         self.debug = bool(debug)
 
-        # buffer for latest radar points
-        self._latest_points = np.zeros((0, 3), dtype=np.float32)
-        # last pullover check
-        self._safety_time = time.time() + safety_delay
+        # latest radar frames, written by the sensor thread. The points of the last
+        # accumulated_frames (not older than accumulation_time) are checked together:
+        # being in world coordinates they don't need to be compensated for the vehicle motion.
+        # Two more slots are kept so that the sensor can write while they are read.
+        self.accumulated_frames = max(1, int(accumulated_frames))
+        self.accumulation_time = float(accumulation_time)
+        self._radar_buffer = RadarFrameBuffer(slots=self.accumulated_frames + 2)
+        self._accumulated = np.zeros((0, 3), dtype=np.float32)
+        # spatial index of the accumulated points (in world coordinates), built once per
+        # radar frame and reused by the checks made from different poses
+        self._grid = PointGrid(grid_cell_size)
+        self._grid_key: tuple[int, int] | None = None
+        # latest verdict, reused until a new radar frame arrives or the vehicle pose
+        # (or the scanned area) changes significantly
+        self.pose_location_step = float(pose_location_step)
+        self.pose_yaw_step = float(pose_yaw_step)
+        self.verdicts: VerdictCache[tuple[object, ...], bool] = VerdictCache()
+        # simulation time after which pulling over can be considered safe. Time is read from
+        # the clock, if given, and the delay starts now. Otherwise it is read from the
+        # timestamp of the latest radar frame, and the delay starts with the first check.
+        self.clock = clock
+        self._safety_time: float | None = clock.now() + self.safety_delay if clock is not None else None
+        self._latest_timestamp: float | None = None
 
         self.vehicle = vehicle
 
@@ -46,68 +74,157 @@ class SafePulloverChecker:
             print(msg)
 
     def radar_callback(self, data):
-        arr = to_cartesian_coords(cast(carla.RadarMeasurement, data))
-        self._latest_points = arr
+        measurement = cast(carla.RadarMeasurement, data)
+        n = len(measurement)
+        # the points are converted directly into the buffer
+        _ = to_cartesian_coords(measurement, out=self._radar_buffer.reserve(n))
+        self._radar_buffer.publish(n, measurement.frame, measurement.timestamp)
+
+    @property
+    def dropped_radar_frames(self) -> int:
+        """Radar frames produced by the sensor that never reached the checker"""
+        return self._radar_buffer.dropped_frames
+
+    def _accumulate(self, radar_frames: list[RadarFrame]) -> np.ndarray:
+        """
+        Points of all the given frames, copied into a reused array
+        (the points of a single frame are returned without copying them).
+        """
+        if len(radar_frames) == 1:
+            return radar_frames[0].points
+        total = sum(f.points.shape[0] for f in radar_frames)
+        if self._accumulated.shape[0] < total:
+            self._accumulated = np.zeros((2 * total, 3), dtype=np.float32)
+        start = 0
+        for f in radar_frames:
+            n = f.points.shape[0]
+            self._accumulated[start : start + n] = f.points
+            start += n
+        return self._accumulated[:total]
+
+    def _scanned_area_box(
+        self, rotated_tr: carla.Transform, depth: float, scan_width: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        World (x, y) bounding box of the indexed points that can fall in the scanned area
+        (x < depth and y < offset + width in the rotated vehicle frame).
+        The area is bounded by the local bounding box of the points, so that the box is finite.
+        """
+        if self._grid.bounds is None:
+            return np.zeros(2), -np.ones(2)  # empty box
+        lo, hi = self._grid.bounds
+        corners = np.array([[x, y, z] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+        local = inverse_transform_points(corners, rotated_tr)
+        local_lo = local.min(axis=0)
+        local_hi = local.max(axis=0)
+        area = np.array([
+            [x, y, z]
+            for x in (local_lo[0], depth)
+            for y in (local_lo[1], self.scanned_area_x_offset + scan_width)
+            for z in (local_lo[2], local_hi[2])
+        ])
+        world = transform_points(area, rotated_tr)
+        return world[:, :2].min(axis=0), world[:, :2].max(axis=0)
 
     # ------------------------------
     # Main decision
     # ------------------------------
 
-    def _is_pullover_safe_no_delay(self, depth: float, scan_width: float, rotation: float = 0) -> bool:
+    def _is_pullover_safe_no_delay(
+        self,
+        depth: float,
+        scan_width: float,
+        rotation: float = 0,
+        vehicle_transform: carla.Transform | None = None,
+    ) -> bool:
+
+        radar_frames = self._radar_buffer.recent(self.accumulated_frames, self.accumulation_time)
+        if not radar_frames:
+            return True
+        radar_frame = radar_frames[0]
+        self._latest_timestamp = radar_frame.timestamp
+
+        vehicle_tr = vehicle_transform if vehicle_transform is not None else self.vehicle.get_transform()
+        key = (
+            radar_frame.seq,
+            pose_bucket(vehicle_tr, self.pose_location_step, self.pose_yaw_step),
+            round(rotation / self.pose_yaw_step),
+            round(depth),
+            round(scan_width / 0.1),
+        )
+        found, verdict = self.verdicts.lookup(key)
+        if found:
+            return cast(bool, verdict)
 
-        pts = self._latest_points.copy().reshape((-1, 3))
+        grid_key = (radar_frame.seq, len(radar_frames))
+        if self._grid_key != grid_key:
+            self._grid_key = None
+            self._grid.build(self._accumulate(radar_frames))
+            if not self._radar_buffer.is_valid(radar_frames[-1]):
+                # the sensor thread reused the slot while indexing, the points may be inconsistent
+                self._debug("Radar frame overwritten during evaluation.")
+                return False
+            self._grid_key = grid_key
+        pts = self._grid.points
         self._debug(pts.shape)
 
         # compute relative positions
-        vehicle_tr = self.vehicle.get_transform()
         rotated_tr = carla.Transform(
             vehicle_tr.location,
             carla.Rotation(pitch=vehicle_tr.rotation.pitch, roll=vehicle_tr.rotation.roll, yaw=vehicle_tr.rotation.yaw + rotation)
         )
+        # only the points in the cells that may contain the scanned area are moved into
+        # the (rotated) vehicle frame
+        candidates = self._grid.candidates_in_box(*self._scanned_area_box(rotated_tr, depth, scan_width))
+        local_pts = inverse_transform_points(pts[candidates], rotated_tr)
 
         thr = depth / self.scanned_area_x_offset # used to select the correct points
-        is_relevant = np.zeros(pts.shape[0], dtype=np.bool)
-        for i in range(pts.shape[0]):
-            vec = carla.Vector3D(float(pts[i, 0]), float(pts[i, 1]), float(pts[i, 2]))
-            rotated_tr.inverse_transform(vec)
-            pts[i, 0] = vec.x 
-            pts[i, 1] = vec.y
-            pts[i, 2] = vec.z
-            is_relevant[i] = (vec.x / vec.y) < thr
+        with np.errstate(divide="ignore", invalid="ignore"):
+            is_relevant = (local_pts[:, 0] / local_pts[:, 1]) < thr
 
         # 1) get points inside the scanned area (from 0 to width + offset)
         # 2) ignore the points that do not obscure the scan (like cars in front of you)
         # x is parallel to car direction
-        in_scanned_area = (pts[:, 1] < self.scanned_area_x_offset + scan_width) & \
-                          (pts[:, 0] < depth)
-        
-        pts_inlier = pts[in_scanned_area & is_relevant]
-        pts_outlier = pts[~(in_scanned_area & is_relevant)]
+        in_scanned_area = (local_pts[:, 1] < self.scanned_area_x_offset + scan_width) & \
+                          (local_pts[:, 0] < depth)
+
+        inliers = candidates[in_scanned_area & is_relevant]
 
         if self.debug:
+            # points are stored in world coordinates, so they can be drawn as they are
+            is_inlier = np.zeros(pts.shape[0], dtype=bool)
+            is_inlier[inliers] = True
+            pts_inlier = pts[is_inlier]
+            pts_outlier = pts[~is_inlier]
             for i in range(pts_inlier.shape[0]):
                 self.radar_sensor.get_world().debug.draw_point(
-                    rotated_tr.transform(carla.Vector3D(float(pts_inlier[i, 0]), float(pts_inlier[i, 1]), float(pts_inlier[i, 2]))),
+                    carla.Location(float(pts_inlier[i, 0]), float(pts_inlier[i, 1]), float(pts_inlier[i, 2])),
                     size=0.075,
                     life_time=0.06,
                     persistent_lines=False,
                     color=carla.Color(255, 0, 0))
             for i in range(pts_outlier.shape[0]):
                 self.radar_sensor.get_world().debug.draw_point(
-                    rotated_tr.transform(carla.Vector3D(float(pts_outlier[i, 0]), float(pts_outlier[i, 1]), float(pts_outlier[i, 2]))),
+                    carla.Location(float(pts_outlier[i, 0]), float(pts_outlier[i, 1]), float(pts_outlier[i, 2])),
                     size=0.075,
                     life_time=0.06,
                     persistent_lines=False,
                     color=carla.Color(255, 255, 255))
-                
-        if pts_inlier.shape[0] < self.min_inliers:
-            self._debug("No obstacles.")
-            return True
 
-        self._debug("Obstacles detected.")
-        return False
+        is_safe = self.verdicts.store(key, inliers.shape[0] < self.min_inliers)
+        if is_safe:
+            self._debug("No obstacles.")
+        else:
+            self._debug("Obstacles detected.")
+        return is_safe
 
-    def is_pullover_safe(self, depth: float, scan_width: float, rotation: float = 0) -> bool:
+    def is_pullover_safe(
+        self,
+        depth: float,
+        scan_width: float,
+        rotation: float = 0,
+        vehicle_transform: carla.Transform | None = None,
+    ) -> bool:
         """
         Return True if pullover is considered safe, False otherwise.
         
@@ -121,14 +238,21 @@ class SafePulloverChecker:
             The alignment in degrees of the scan. 0 means it goes stright ahead, any other value rotates the area around the
             top-right corner of the vehicle.
             By default `rotation` is 0.
+        vehicle_transform: carla.Transform | None
+            The current transform of the vehicle, if already known. When None it is read from the vehicle.
         """
-        is_safe = self._is_pullover_safe_no_delay(depth, scan_width, rotation)
+        is_safe = self._is_pullover_safe_no_delay(depth, scan_width, rotation, vehicle_transform)
 
-        if not is_safe:
+        if self._latest_timestamp is None:
+            # no radar frame received yet
+            return False
+        # the delay is measured in simulation time
+        now = self.clock.now() if self.clock is not None else self._latest_timestamp
+        if not is_safe or self._safety_time is None:
             # when not safe, reset timer for safety
-            self._safety_time = time.time() + self.safety_delay
+            self._safety_time = now + self.safety_delay
 
         # is safe only if the safety timer has expired
-        return is_safe if self._safety_time <= time.time() else False
+        return is_safe if self._safety_time <= now else False
 
 
@@ -0,0 +1,18 @@
+class SimulationClock:
+    """
+    Simulation time (seconds), independent from the wall clock.
+
+    It is synchronized by its owner with the world snapshot timestamp once per
+    step, so that timers based on it behave the same whether the simulation runs
+    slower or faster than real time.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def now(self) -> float:
+        return self._now
+
+    def sync(self, timestamp: float):
+        """Sets the clock to the given simulation timestamp (ex: elapsed seconds of the world snapshot)."""
+        self._now = float(timestamp)
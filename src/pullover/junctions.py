@@ -0,0 +1,201 @@
+from collections import deque
+
+import carla
+
+from .topology import TopologyIndex
+from .verdict_cache import VerdictCache
+
+type WaypointKey = tuple[int, int, int, int]
+"""
+(road_id, section_id, lane_id, s) where s is rounded to the meter
+"""
+
+
+def _waypoint_key(w: carla.Waypoint) -> WaypointKey:
+    return (w.road_id, w.section_id, w.lane_id, round(w.s))
+
+
+def _waypoints_roughly_same_direction(w1: carla.Waypoint, w2: carla.Waypoint) -> bool:
+    return w1.transform.get_forward_vector().dot(w2.transform.get_forward_vector()) > 0
+
+
+def _waypoints_same_road(w1: carla.Waypoint, w2: carla.Waypoint) -> bool:
+    return w1.road_id == w2.road_id
+
+
+class _HorizonEntry:
+    __slots__ = ("waypoint", "key", "distance", "is_junction")
+
+    def __init__(self, waypoint: carla.Waypoint, distance: int):
+        self.waypoint = waypoint
+        self.key = _waypoint_key(waypoint)
+        self.distance = distance
+        """
+        Distance (meters) from the first waypoint ever added to the horizon
+        """
+        self.is_junction: bool | None = None
+        """
+        Whether the waypoint is part of a junction on our side of the road.
+        None until it is computed
+        """
+
+
+class JunctionHorizon:
+    """
+    Scans the lane ahead of the vehicle looking for junctions on its side of the road.
+
+    The waypoints ahead of the vehicle (one every meter) are kept between ticks and indexed
+    by (road_id, section_id, lane_id, s), so that on every tick the vehicle is located in the
+    horizon, the waypoints already passed are dropped and the horizon is only extended by the
+    distance travelled since the previous tick.
+    The waypoints of each junction are memoized, so each junction is queried to the simulator once.
+    """
+
+    def __init__(self, topology: TopologyIndex):
+        self._topology = topology
+        self._entries: deque[_HorizonEntry] = deque()
+        self._index: dict[WaypointKey, _HorizonEntry] = {}
+        self._dead_end = False
+        """
+        True when the continuation of the last lane in the horizon could not be found
+        """
+        self._junction_waypoints: dict[int, list[tuple[carla.Waypoint, carla.Waypoint]]] = {}
+        self.verdicts: VerdictCache[tuple[WaypointKey, int], float | None] = VerdictCache()
+        """
+        Latest distance, reused while the vehicle stays on the same waypoint (the horizon has a resolution of one meter)
+        """
+
+    def reset(self):
+        """
+        Forgets the scanned waypoints (junction waypoints are kept as the map is static)
+        """
+        self._entries.clear()
+        self._index.clear()
+        self._dead_end = False
+        self.verdicts.invalidate()
+
+    def first_junction_distance(self, curr_waypoint: carla.Waypoint, max_range: float) -> float | None:
+        """
+        Distance (meters) from the first junction on our side of the road within max_range.
+
+        Returns None if no junction has been found, 0 if the lane continuation could not be
+        found (in which case there may be a junction and we assume there is one for safety reasons).
+        """
+        key = (_waypoint_key(curr_waypoint), int(max_range))
+        found, distance = self.verdicts.lookup(key)
+        if found:
+            return distance
+        return self.verdicts.store(key, self._first_junction_distance(curr_waypoint, max_range))
+
+    def _first_junction_distance(self, curr_waypoint: carla.Waypoint, max_range: float) -> float | None:
+        entry = self._locate(curr_waypoint)
+        if entry is None:
+            self.reset()
+            self._append(curr_waypoint)
+        else:
+            while self._entries[0].distance < entry.distance:
+                self._remove(self._entries.popleft())
+
+        # +1 because curr_waypoint is counted
+        sensors_range = int(max_range) + 1
+        if not self._extend(sensors_range):
+            return 0
+
+        origin = self._entries[0].distance
+        for e in self._entries:
+            distance = e.distance - origin
+            if distance >= sensors_range:
+                break
+            if e.is_junction is None:
+                e.is_junction = self._is_junction_on_our_side(e.waypoint)
+            if e.is_junction:
+                return distance
+        return None
+
+    def _locate(self, w: carla.Waypoint) -> _HorizonEntry | None:
+        """
+        Finds the horizon entry closest to the given waypoint (if it is less than a meter away)
+        """
+        road_id, section_id, lane_id, s = _waypoint_key(w)
+        candidates = (
+            self._index.get((road_id, section_id, lane_id, s + offset))
+            for offset in (0, -1, 1)
+        )
+        closest = min(
+            (e for e in candidates if e is not None),
+            key=lambda e: abs(e.waypoint.s - w.s),
+            default=None,
+        )
+        if closest is None or abs(closest.waypoint.s - w.s) > 1:
+            return None
+        return closest
+
+    def _append(self, w: carla.Waypoint):
+        distance = self._entries[-1].distance + 1 if self._entries else 0
+        entry = _HorizonEntry(w, distance)
+        self._entries.append(entry)
+        self._index[entry.key] = entry
+
+    def _remove(self, entry: _HorizonEntry):
+        if self._index.get(entry.key) is entry:
+            del self._index[entry.key]
+
+    def _extend(self, length: int) -> bool:
+        """
+        Extends the horizon until it contains at least `length` waypoints.
+        Returns False if it was not possible to find the lane continuation, on every call
+        until the horizon is reset (the lane is always walked up to its end, so the missing
+        continuation stays ahead of the vehicle whatever its distance).
+        """
+        if self._dead_end:
+            return False
+        while len(self._entries) < length:
+            for w in self._entries[-1].waypoint.next_until_lane_end(1):
+                self._append(w)
+            last_w = self._entries[-1].waypoint
+            first_of_next_section = self._topology.lane_continuation(last_w)
+            if first_of_next_section is None:
+                # Some roads intersections are connected in strange ways and i was unable
+                # to reliably find the correct lane continuation, in which case we assume
+                # there may be a junction (for safety reasons)
+                self._dead_end = True
+                return False
+            # The lane end is replaced by the first waypoint of the next section
+            self._remove(self._entries.pop())
+            self._append(first_of_next_section)
+        return True
+
+    def _is_junction_on_our_side(self, w: carla.Waypoint) -> bool:
+        # Junctions are road segments and as such they include both sides, so checking if
+        # the waypoint is part of a junction is not enough because we don't care if the
+        # actual exit or entry is on the other side of the road
+        if not w.is_junction:
+            return False
+
+        # The direction test depends on the heading of w (which changes along curved
+        # connecting roads), so only the junction waypoints are memoized
+        junction_waypoints = self._junction_waypoints.get(w.junction_id)
+        if junction_waypoints is None:
+            junction_waypoints = w.get_junction().get_waypoints(carla.LaneType.Any)
+            self._junction_waypoints[w.junction_id] = junction_waypoints
+
+        # Here we take just those waypoints that point to the same direction as the vehicle
+        same_direction = filter(
+            lambda t: _waypoints_roughly_same_direction(t[0], w)
+            and _waypoints_roughly_same_direction(t[1], w),
+            junction_waypoints,
+        )
+
+        # Here we search for a waypoint that is part of a different road than the vehicle one
+        waypoint_in_different_road = next(
+            filter(
+                lambda t: not _waypoints_same_road(t[0], w)
+                or not _waypoints_same_road(t[1], w),
+                same_direction,
+            ),
+            None,
+        )
+
+        # If there is at least one waypoint that is part of a different road then
+        # we assume there is an actual junction on the vehicle side of the road
+        return waypoint_in_different_road is not None
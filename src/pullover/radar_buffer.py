@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class RadarFrame:
+    """
+    A radar frame published by a RadarFrameBuffer.
+
+    `points` is a view of the buffer slot, it stays valid until the writer
+    reuses the slot (see RadarFrameBuffer.is_valid).
+    """
+
+    __slots__ = ("points", "timestamp", "seq")
+
+    def __init__(self, points: np.ndarray, timestamp: float, seq: int):
+        self.points = points
+        self.timestamp = timestamp
+        self.seq = seq
+
+
+class RadarFrameBuffer:
+    """
+    Multiple buffering of radar point clouds between the sensor thread (the
+    single writer) and the readers, without locks nor copies.
+
+    The writer fills the slot following the latest published one (preallocated
+    with room for `capacity` points, grown only if a frame has more points)
+    and then publishes it by advancing the sequence number. Readers get views
+    of the latest slots (see `recent`), a slot is not written again until
+    `slots - 1` more frames have been published.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of points preallocated in each slot.
+    slots: int
+        Number of slots (3 by default, triple buffering).
+    """
+
+    def __init__(self, capacity: int = 4096, slots: int = 3):
+        self.slots = max(2, int(slots))
+        self._points = [np.zeros((int(capacity), 3), dtype=np.float32) for _ in range(self.slots)]
+        self._counts = np.zeros(self.slots, dtype=np.int64)
+        self._timestamps = np.zeros(self.slots, dtype=np.float64)
+        self._seq = -1
+        self._last_frame: int | None = None
+        self.dropped_frames = 0
+        """Sensor frames that never reached the buffer (gaps in the sensor frame ids)"""
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest published frame (-1 if none has been published yet)."""
+        return self._seq
+
+    def reserve(self, n: int) -> np.ndarray:
+        """
+        Return a writable (n, 3) view of the next slot, to be filled by the writer
+        and then published with `publish`.
+        """
+        slot = (self._seq + 1) % self.slots
+        if self._points[slot].shape[0] < n:
+            self._points[slot] = np.zeros((max(n, 2 * self._points[slot].shape[0]), 3), dtype=np.float32)
+        return self._points[slot][:n]
+
+    def publish(self, n: int, frame: int, timestamp: float):
+        """
+        Publish the slot returned by the last `reserve` call, holding n points
+        measured at the given sensor frame and timestamp (seconds of simulation).
+        """
+        slot = (self._seq + 1) % self.slots
+        self._counts[slot] = n
+        self._timestamps[slot] = timestamp
+        if self._last_frame is not None and frame > self._last_frame + 1:
+            self.dropped_frames += frame - self._last_frame - 1
+        self._last_frame = frame
+        self._seq += 1  # publish
+
+    def recent(self, count: int, max_age: float) -> list[RadarFrame]:
+        """
+        The latest `count` published frames (at most `slots - 1`), newest first, without copying
+        the points. Frames measured more than `max_age` seconds before the latest one are excluded.
+        """
+        seq = self._seq
+        frames: list[RadarFrame] = []
+        for s in range(seq, max(seq - min(count, self.slots - 1), -1), -1):
+            slot = s % self.slots
+            timestamp = float(self._timestamps[slot])
+            if frames and frames[0].timestamp - timestamp > max_age:
+                break
+            frames.append(RadarFrame(self._points[slot][: self._counts[slot]], timestamp, s))
+        return frames
+
+    def is_valid(self, frame: RadarFrame) -> bool:
+        """Whether the slot of the given frame has not been reused by the writer yet."""
+        return self._seq - frame.seq < self.slots - 1
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+
+class PointGrid:
+    """
+    Uniform grid over the xy plane of a point cloud, used to select the points
+    of an area without testing every point of the cloud.
+
+    The points are sorted by cell when the grid is built, so the points of a
+    row of cells are contiguous and a query only gathers the rows and columns
+    of cells overlapping the area. The arrays are reused by the next builds
+    (they only grow).
+
+    Parameters
+    ----------
+    cell_size: float
+        Side of the cells (in meters).
+    max_cells: int
+        Maximum number of cells, the cells are enlarged when the points are too
+        spread out.
+    """
+
+    def __init__(self, cell_size: float = 2.0, max_cells: int = 1 << 16):
+        self.cell_size = float(cell_size)
+        self.max_cells = int(max_cells)
+        self._points = np.zeros((0, 3), dtype=np.float32)
+        self._n = 0
+        self._cell = self.cell_size
+        self._origin = np.zeros(2)
+        self._shape = (0, 0)
+        self._starts = np.zeros(1, dtype=np.int64)
+        self.bounds: tuple[np.ndarray, np.ndarray] | None = None
+        """Minimum and maximum (x, y, z) of the points, None if there are no points"""
+
+    @property
+    def points(self) -> np.ndarray:
+        """The (N,3) indexed points, sorted by cell. Queries return indices into this array."""
+        return self._points[: self._n]
+
+    def build(self, points: np.ndarray):
+        """
+        Index the given (N,3) points (they are copied).
+        """
+        n = points.shape[0]
+        if self._points.shape[0] < n:
+            self._points = np.zeros((2 * n, 3), dtype=np.float32)
+        self._n = n
+        if n == 0:
+            self.bounds = None
+            self._shape = (0, 0)
+            self._starts = np.zeros(1, dtype=np.int64)
+            return
+
+        lo = points.min(axis=0)
+        hi = points.max(axis=0)
+        self.bounds = (lo, hi)
+        self._origin = lo[:2].astype(np.float64)
+        extent = (hi[:2] - lo[:2]).astype(np.float64)
+        cell = self.cell_size
+        while math.prod(int(e // cell) + 1 for e in extent) > self.max_cells:
+            cell *= 2
+        self._cell = cell
+        nx, ny = (int(e // cell) + 1 for e in extent)
+        self._shape = (nx, ny)
+
+        ix, iy = self._cell_coords(points[:, :2])
+        cells = ix * ny + iy
+        order = np.argsort(cells, kind="stable")
+        self._points[:n] = points[order]
+        self._starts = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=self._starts[1:])
+
+    def _cell_coords(self, xy: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        nx, ny = self._shape
+        c = np.floor((xy - self._origin) / self._cell).astype(np.int64)
+        return np.clip(c[:, 0], 0, nx - 1), np.clip(c[:, 1], 0, ny - 1)
+
+    def candidates_in_box(self, min_xy, max_xy) -> np.ndarray:
+        """
+        Indices of the points in the cells overlapping the box [min_xy, max_xy]:
+        a superset of the points inside the box, to be tested exactly by the caller.
+        """
+        if self.bounds is None:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = self.bounds
+        if min_xy[0] > hi[0] or min_xy[1] > hi[1] or max_xy[0] < lo[0] or max_xy[1] < lo[1]:
+            return np.empty(0, dtype=np.int64)
+        ix, iy = self._cell_coords(np.array([min_xy, max_xy], dtype=np.float64))
+        ny = self._shape[1]
+        # in a row of cells (same x) the points of consecutive columns are contiguous
+        ranges = [
+            np.arange(self._starts[row * ny + iy[0]], self._starts[row * ny + iy[1] + 1])
+            for row in range(ix[0], ix[1] + 1)
+        ]
+        return np.concatenate(ranges)
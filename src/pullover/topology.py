@@ -0,0 +1,35 @@
+import carla
+
+type LaneKey = tuple[int, int, int]
+"""
+(road_id, section_id, lane_id)
+"""
+
+
+def _lane_key(w: carla.Waypoint) -> LaneKey:
+    return (w.road_id, w.section_id, w.lane_id)
+
+
+class TopologyIndex:
+    """
+    Index over the map topology (see `carla.Map.get_topology`) that allows to find lane
+    continuations in constant time instead of scanning the whole topology.
+
+    Each topology entry is a pair (w1, w2) where w1 is the beginning of a lane and w2 is
+    the beginning of one of the lanes that follow it.
+    """
+
+    def __init__(self, topology: list[tuple[carla.Waypoint, carla.Waypoint]]):
+        self.topology = topology
+        self._continuations: dict[LaneKey, carla.Waypoint] = {}
+        for w1, w2 in topology:
+            # Only the first match is kept, consistently with a linear scan of the topology
+            _ = self._continuations.setdefault((w1.road_id, w1.section_id, w2.lane_id), w2)
+
+    def lane_continuation(self, w: carla.Waypoint) -> carla.Waypoint | None:
+        """
+        First waypoint of the lane that continues the lane of `w` with the same lane id
+        once its section ends, or None if there is no such lane.
+        """
+        return self._continuations.get(_lane_key(w))
+
@@ -1,29 +1,73 @@
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 import numpy as np
-import carla
 import math
 
-def to_cartesian_coords(radar_measurement: carla.RadarMeasurement) -> np.ndarray:
-        """Convert CARLA radar detections to Nx3 numpy array and store them."""
-        pts = []
-        for detection in radar_measurement:
-            # conversion from polar to cartesian coordinates
-            azi = math.degrees(detection.azimuth)
-            alt = math.degrees(detection.altitude)
-            fw_vec = carla.Vector3D(x=detection.depth - 0.25)
-            current_rot = radar_measurement.transform.rotation
-            carla.Transform(
-                carla.Location(),
-                carla.Rotation(
-                    pitch=current_rot.pitch + alt,
-                    yaw=current_rot.yaw + azi,
-                    roll=current_rot.roll)).transform(fw_vec)
-            
-            x = radar_measurement.transform.location.x + fw_vec.x
-            y = radar_measurement.transform.location.y + fw_vec.y
-            z = radar_measurement.transform.location.z + fw_vec.z
-            pts.append((x, y, z))
-        return np.asarray(pts, np.float32)
+if TYPE_CHECKING:
+    # only used in annotations, so the batched utilities don't require the simulator package
+    import carla
+
+def to_cartesian_coords(radar_measurement: "carla.RadarMeasurement", out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert CARLA radar detections to an Nx3 numpy array of world coordinates.
+
+    The raw detection buffer is read in place (each detection is made of four float32:
+    velocity, azimuth, altitude and depth) and converted with array operations.
+    If given, `out` (an Nx3 float32 array, N being the number of detections) is filled instead
+    of allocating the result.
+    """
+    detections = np.frombuffer(radar_measurement.raw_data, dtype=np.float32).reshape((-1, 4))
+    sensor_tr = radar_measurement.transform
+    # conversion from polar to cartesian coordinates: rotating the forward vector (depth, 0, 0)
+    # by (pitch + altitude, yaw + azimuth, roll) only depends on pitch and yaw
+    pitch = np.radians(sensor_tr.rotation.pitch) + detections[:, 2]
+    yaw = np.radians(sensor_tr.rotation.yaw) + detections[:, 1]
+    depth = detections[:, 3] - 0.25
+
+    pts = np.empty((detections.shape[0], 3), dtype=np.float32) if out is None else out
+    pts[:, 0] = depth * np.cos(pitch) * np.cos(yaw) + sensor_tr.location.x
+    pts[:, 1] = depth * np.cos(pitch) * np.sin(yaw) + sensor_tr.location.y
+    pts[:, 2] = depth * np.sin(pitch) + sensor_tr.location.z
+    return pts
+
+# ==============================
+# Batched transform utilities
+# ==============================
+
+def rotation_matrix(rotation: "carla.Rotation") -> np.ndarray:
+    """
+    Build the 3x3 matrix used by CARLA to rotate a vector from local to global
+    coordinates (roll around x, then pitch around y, then yaw around z).
+
+    Being a rotation matrix its transpose performs the inverse rotation.
+    """
+    cy, sy = math.cos(math.radians(rotation.yaw)), math.sin(math.radians(rotation.yaw))
+    cp, sp = math.cos(math.radians(rotation.pitch)), math.sin(math.radians(rotation.pitch))
+    cr, sr = math.cos(math.radians(rotation.roll)), math.sin(math.radians(rotation.roll))
+    return np.array([
+        [cp * cy, cy * sp * sr - sy * cr, -cy * sp * cr - sy * sr],
+        [cp * sy, sy * sp * sr + cy * cr, -sy * sp * cr + cy * sr],
+        [sp, -cp * sr, cp * cr],
+    ])
+
+
+def transform_points(points: np.ndarray, transform: "carla.Transform") -> np.ndarray:
+    """
+    Batched version of `carla.Transform.transform`: maps an (N,3) array of points
+    from the local coordinates of `transform` to global coordinates.
+    """
+    loc = transform.location
+    # points are rows, so multiplying by R^T rotates each of them by R
+    return points @ rotation_matrix(transform.rotation).T + np.array([loc.x, loc.y, loc.z])
+
+
+def inverse_transform_points(points: np.ndarray, transform: "carla.Transform") -> np.ndarray:
+    """
+    Batched version of `carla.Transform.inverse_transform`: maps an (N,3) array of
+    points from global coordinates to the local coordinates of `transform`.
+    """
+    loc = transform.location
+    # points are rows, so multiplying by R applies the inverse rotation R^T to each of them
+    return (points - np.array([loc.x, loc.y, loc.z])) @ rotation_matrix(transform.rotation)
 
 # ==============================
 # RANSAC plane fitting utilities
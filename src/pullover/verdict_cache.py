@@ -0,0 +1,61 @@
+import math
+
+import carla
+
+type PoseBucket = tuple[int, int, int]
+"""
+(x, y, yaw) of a pose quantized to buckets
+"""
+
+
+def pose_bucket(transform: carla.Transform, location_step: float = 0.5, yaw_step: float = 2.0) -> PoseBucket:
+    """
+    Quantizes the pose so that poses closer than about location_step meters and
+    yaw_step degrees usually fall in the same bucket.
+    """
+    return (
+        math.floor(transform.location.x / location_step),
+        math.floor(transform.location.y / location_step),
+        math.floor((transform.rotation.yaw % 360) / yaw_step),
+    )
+
+
+class VerdictCache[K, V]:
+    """
+    Keeps the latest verdict along with the key describing the data it was
+    computed from (ex: sensor frame id, ego pose bucket), so that it can be
+    reused until new data arrives or the pose changes significantly.
+
+    It counts how many verdicts have been evaluated and how many evaluations
+    have been saved by reusing the latest verdict.
+    """
+
+    def __init__(self):
+        self._key: K | None = None
+        self._verdict: V | None = None
+        self._valid = False
+        self.evaluations = 0
+        self.reuses = 0
+
+    def lookup(self, key: K) -> tuple[bool, V | None]:
+        """
+        Returns (True, verdict) if the latest verdict was computed for key,
+        (False, None) otherwise
+        """
+        if self._valid and self._key == key:
+            self.reuses += 1
+            return True, self._verdict
+        return False, None
+
+    def store(self, key: K, verdict: V) -> V:
+        """
+        Publishes the verdict computed for key
+        """
+        self._key = key
+        self._verdict = verdict
+        self._valid = True
+        self.evaluations += 1
+        return verdict
+
+    def invalidate(self):
+        self._valid = False
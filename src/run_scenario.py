@@ -16,7 +16,10 @@ from carla import (
 )
 
 import scenarios
-from inattention.detector import WebcamCameraStream
+from inattention.detector import FileCameraStream, WebcamCameraStream
+from inattention.models import models
+from inattention.pool import InattentionProcessPool
+from inattention.utils import LANDMARK_BACKENDS
 from pygame_io import PygameIO
 from vehicle_logging_config import VehicleLoggingConfig
 from vehicle_state_machine import VehicleParams, VehicleStateMachine
@@ -43,6 +46,40 @@ _ = parser.add_argument(
     default="0",
 )
 
+_ = parser.add_argument(
+    "-camera_gray_capture",
+    help="Request grayscale (or YUYV) frames from the camera instead of converting color ones, if supported by the device",
+    action="store_true",
+)
+
+_ = parser.add_argument(
+    "-driver_recording",
+    help="Replay a recording of the driver (video file, directory of images or .npy dump of frames) instead of using the webcam",
+    type=str,
+    default=None,
+)
+
+_ = parser.add_argument(
+    "-face_backend",
+    help="Backend computing the eye landmarks of the driver. The opencv one requires opencv-contrib-python and the YuNet and LBF models in src/inattention/model",
+    choices=LANDMARK_BACKENDS,
+    default="dlib",
+)
+
+_ = parser.add_argument(
+    "-driver_profile",
+    help="JSON file with the calibrated EAR threshold of the driver, it is created after the calibration if it doesn't exist",
+    type=str,
+    default=None,
+)
+
+_ = parser.add_argument(
+    "-inattention_workers",
+    help="Number of processes used to run the inattention detection, 0 (default) runs it on a background thread",
+    type=int,
+    default=0,
+)
+
 _ = parser.add_argument(
     "-wake_up_sound",
     help="Sound to play in order to wake up the driver.",
@@ -57,6 +94,12 @@ _ = parser.add_argument(
     default=60,
 )
 
+_ = parser.add_argument(
+    "-max_speed",
+    help="Run the simulation as fast as possible instead of pacing it to real time (ex: for headless runs). Pull over decisions are based on simulation time, so they don't change",
+    action="store_true",
+)
+
 _ = parser.add_argument(
     "-use_pygame_camera",
     help="Send camera feed to pygame window (heavier on system resources)",
@@ -91,6 +134,25 @@ RADAR_SCAN_WIDTH = 3
 
 camera: Sensor | None = None
 
+# The inattention workers are forked, so the pool must be created before any other thread
+# is started (model warm up, simulator client, pygame)
+inattention_pool = (
+    InattentionProcessPool(
+        cast(int, args.inattention_workers),
+        detector_kwargs={
+            "tracking": True,
+            "detection_scale": VehicleParams.face_detection_scale,
+            "upsample": VehicleParams.face_detection_upsample,
+            "backend": cast(str, args.face_backend),
+        },
+    )
+    if cast(int, args.inattention_workers) > 0
+    else None
+)
+
+# Load the face landmarks model while connecting to the simulator
+model_warm_up = models.warm_up() if args.face_backend == "dlib" else None
+
 host = os.environ.get("HOST", "localhost")
 port = os.environ.get("PORT", "2000")
 port = int(port)
@@ -147,10 +209,18 @@ try:
         # Bind camera to pygame window
         camera.listen(lambda image: io.prepare_output_image(cast(Image, image)))
 
-    # Getting driver camera (webcam)
-    driver_camera_stream = WebcamCameraStream(
-        device=cast(str | int, args.camera_device), width=600, height=480
-    )
+    # Getting driver camera (webcam or recording)
+    if args.driver_recording is not None:
+        driver_camera_stream = FileCameraStream(
+            cast(str, args.driver_recording), realtime=True, loop=True
+        )
+    else:
+        driver_camera_stream = WebcamCameraStream(
+            device=cast(str | int, args.camera_device),
+            width=600,
+            height=480,
+            gray_capture=cast(bool, args.camera_gray_capture),
+        )
 
     # Spawn radar
     front_radar = cast(
@@ -163,24 +233,34 @@ try:
         ),
     )
 
+    params = VehicleParams(
+        sensors_max_range=SENSORS_MAX_RANGE,
+        cruise_target_speed_kmh=scenario.cruise_control_speed,
+        max_pull_over_acceleration=-2.0,
+        radar_scan_width=RADAR_SCAN_WIDTH,
+    )
+    params.driver_profile_path = cast(str | None, args.driver_profile)
+    params.face_backend = cast(str, args.face_backend)
+
     state_machine = VehicleStateMachine(
         pygame_io=io,
         vehicle=vehicle,
         world=world,
         map=map,
         traffic_manager=traffic_manager,
-        params=VehicleParams(
-            sensors_max_range=SENSORS_MAX_RANGE,
-            cruise_target_speed_kmh=scenario.cruise_control_speed,
-            max_pull_over_acceleration=-2.0,
-            radar_scan_width=RADAR_SCAN_WIDTH,
-        ),
+        params=params,
         driver_camera_stream=driver_camera_stream,
         front_radar=front_radar,
         wake_up_sound=pygame.mixer.Sound(cast(str, args.wake_up_sound)),
         logging_config=VehicleLoggingConfig(log_entries=True),
+        inattention_pool=inattention_pool,
     )
 
+    if model_warm_up is not None:
+        model_warm_up.join()
+    if models.load_time is not None:
+        print(f"Face landmarks model loaded in {models.load_time:.2f}s")
+
     def move_to_with_local_offsets(
         target: Transform, location_offset: Location, rotation_offset: Rotation
     ):
@@ -224,7 +304,7 @@ try:
 
         compute_time = time.time() - tick_start
         should_exit = not state_machine.step(DT)
-        if compute_time < DT:
+        if compute_time < DT and not cast(bool, args.max_speed):
             time.sleep(DT - compute_time)
 
 finally:
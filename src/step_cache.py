@@ -0,0 +1,47 @@
+from collections.abc import Callable
+from typing import cast
+
+
+class StepCache:
+    """
+    Memoizes values derived from the simulation state for the duration of a single
+    state machine step, it must be invalidated at the beginning of every step.
+
+    It also counts how many times each value has been computed and how many times it
+    has been served from the cache, both for the current step and in total.
+    """
+
+    _values: dict[str, object]
+    step_computations: dict[str, int]
+    step_hits: dict[str, int]
+    total_computations: dict[str, int]
+    total_hits: dict[str, int]
+
+    def __init__(self):
+        self._values = {}
+        self.step_computations = {}
+        self.step_hits = {}
+        self.total_computations = {}
+        self.total_hits = {}
+
+    def invalidate(self):
+        """
+        Forgets all the cached values, to be called at the beginning of every step
+        """
+        self._values.clear()
+        self.step_computations.clear()
+        self.step_hits.clear()
+
+    def get[T](self, key: str, compute: Callable[[], T]) -> T:
+        """
+        Returns the value cached under key, computing it if it is not cached yet
+        """
+        if key in self._values:
+            self.step_hits[key] = self.step_hits.get(key, 0) + 1
+            self.total_hits[key] = self.total_hits.get(key, 0) + 1
+            return cast(T, self._values[key])
+        value = compute()
+        self._values[key] = value
+        self.step_computations[key] = self.step_computations.get(key, 0) + 1
+        self.total_computations[key] = self.total_computations.get(key, 0) + 1
+        return value
@@ -0,0 +1,34 @@
+"""
+Scalar port of the CARLA transforms used by the per-point code paths replaced by
+pullover.utils (see Transform::TransformPoint, Transform::InverseTransformPoint and
+Rotation::RotateVector in LibCarla), on plain tuples: locations are (x, y, z) and
+rotations (pitch, yaw, roll) in degrees.
+"""
+import math
+
+
+def rotate(rotation: tuple[float, float, float], v: tuple[float, float, float], inverse: bool = False):
+    """Scalar port of Rotation::RotateVector (roll around x, then pitch around y, then yaw around z)."""
+    pitch, yaw, roll = (math.radians(a) for a in rotation)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    m = [
+        [cp * cy, cy * sp * sr - sy * cr, -cy * sp * cr - sy * sr],
+        [cp * sy, sy * sp * sr + cy * cr, -sy * sp * cr + cy * sr],
+        [sp, -cp * sr, cp * cr],
+    ]
+    if inverse:
+        m = [list(column) for column in zip(*m)]
+    return tuple(m[i][0] * v[0] + m[i][1] * v[1] + m[i][2] * v[2] for i in range(3))
+
+
+def transform_point(location, rotation, p):
+    """Scalar port of Transform::TransformPoint."""
+    r = rotate(rotation, p)
+    return tuple(r[i] + location[i] for i in range(3))
+
+
+def inverse_transform_point(location, rotation, p):
+    """Scalar port of Transform::InverseTransformPoint."""
+    return rotate(rotation, tuple(p[i] - location[i] for i in range(3)), inverse=True)
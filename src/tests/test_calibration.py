@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from inattention.calibration import EarHistogram, ThresholdCalibrator
+
+BIN_WIDTH = 0.6 / 120
+
+
+def _histogram(samples) -> EarHistogram:
+    histogram = EarHistogram()
+    for ear in samples:
+        histogram.add(float(ear))
+    return histogram
+
+
+def test_median_of_uniform_samples():
+    histogram = _histogram(np.linspace(0.2, 0.4, 1001))
+    assert histogram.quantile(0.5) == pytest.approx(0.3, abs=BIN_WIDTH)
+
+
+def test_quantile_bounds_are_the_edges_of_the_occupied_bins():
+    # bins [0.210, 0.215) and [0.330, 0.335)
+    histogram = _histogram([0.212] * 10 + [0.333] * 10)
+    assert histogram.quantile(0) == pytest.approx(0.210)
+    assert histogram.quantile(1) == pytest.approx(0.335)
+    # out of range quantiles are clamped
+    assert histogram.quantile(-1) == histogram.quantile(0)
+    assert histogram.quantile(2) == histogram.quantile(1)
+
+
+def test_quantile_of_empty_histogram_is_nan():
+    assert np.isnan(EarHistogram().quantile(0.5))
+
+
+@pytest.mark.parametrize(
+    "ear, expected_threshold",
+    [
+        (0.05, 0.12),  # clamped to min_threshold
+        (0.30, 0.75 * 0.30),
+        (0.55, 0.32),  # clamped to max_threshold
+    ],
+)
+def test_profile_threshold_is_clamped(ear: float, expected_threshold: float):
+    calibrator = ThresholdCalibrator(closed_ratio=0.75, min_threshold=0.12, max_threshold=0.32)
+    for _ in range(100):
+        calibrator.add(ear, 0.1)
+    profile = calibrator.profile("driver")
+    assert profile.eye_threshold == pytest.approx(expected_threshold, abs=0.75 * BIN_WIDTH)
+    assert profile.open_ear == pytest.approx(ear, abs=BIN_WIDTH)
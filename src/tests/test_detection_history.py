@@ -0,0 +1,75 @@
+import pytest
+
+from inattention.detector import DetectionHistory
+
+
+class _WriterDuringRead:
+    """
+    Wraps the capture timestamps of a DetectionHistory: the first time a reader reads
+    them, the writer writes `writes` records and starts writing one more (the timestamp
+    and the EAR are written, the sequence number is not advanced yet).
+    """
+
+    def __init__(self, history: DetectionHistory, writes: int):
+        self.history = history
+        self.array = history._capture_ts
+        self.writes = writes
+
+    def __getitem__(self, i):
+        if self.writes is not None:
+            writes, self.writes = self.writes, None
+            for _ in range(writes):
+                _write(self.history, self.history.seq)
+            slot = self.history.seq % self.history.capacity
+            self.array[slot] = -1.0
+            self.history._ear[slot] = -1.0
+        return self.array[i]
+
+    def __setitem__(self, i, value):
+        self.array[i] = value
+
+
+def _write(history: DetectionHistory, i: int):
+    """Writes record i, whose fields are all derived from i."""
+    history.write(float(i), float(i), i % 2, True)
+
+
+def _assert_consistent(records):
+    """Records are intact and consecutive."""
+    for r in records:
+        assert r.capture_ts >= 0 and r.ear == r.capture_ts and r.label == int(r.capture_ts) % 2
+    ts = [r.capture_ts for r in records]
+    assert ts == [ts[0] + i for i in range(len(ts))]
+
+
+def test_since_returns_new_records():
+    history = DetectionHistory(capacity=8)
+    for i in range(5):
+        _write(history, i)
+    records, seq = history.since(0)
+    assert [r.capture_ts for r in records] == [0, 1, 2, 3, 4] and seq == 5
+    _write(history, 5)
+    records, seq = history.since(seq)
+    assert [r.capture_ts for r in records] == [5] and seq == 6
+
+
+def test_since_skips_the_slot_being_written():
+    history = DetectionHistory(capacity=8)
+    for i in range(20):
+        _write(history, i)
+    records, seq = history.since(0)
+    # the slot of record 12 is the next one the writer fills
+    assert [r.capture_ts for r in records] == list(range(13, 20)) and seq == 20
+
+
+@pytest.mark.parametrize("writes", [0, 1, 3, 7])
+def test_since_drops_records_overwritten_while_reading(writes: int):
+    history = DetectionHistory(capacity=8)
+    for i in range(20):
+        _write(history, i)
+    history._capture_ts = _WriterDuringRead(history, writes)  # pyright: ignore[reportAttributeAccessIssue]
+    records, seq = history.since(0)
+    _assert_consistent(records)
+    assert seq == 20
+    # the records still intact when the read ended are returned
+    assert [r.capture_ts for r in records] == list(range(20 + writes - 8 + 1, 20))
@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from inattention.drowsiness import DrowsinessMetrics
+
+
+def test_frames_are_evicted_at_capacity():
+    metrics = DrowsinessMetrics(capacity=3, max_interval=10)
+    # (ts, closed): the first frame has no weight, the others weigh 1 second each
+    for ts, closed in [(0, True), (1, True), (2, False), (3, False)]:
+        metrics.update(ts, 0.3, face_found=True, closed=closed)
+    # the first frame is evicted: 1 closed second out of 3
+    assert metrics.perclos == pytest.approx(1 / 3)
+    metrics.update(4, 0.3, face_found=True, closed=False)
+    # the closed frame at ts 1 is evicted too
+    assert metrics.perclos == 0
+    assert metrics.report().ear_mean == pytest.approx(0.3)
+
+
+def test_blink_is_evicted_with_the_frame_it_ended_on():
+    metrics = DrowsinessMetrics(window=10, max_interval=1)
+    # a one second blink, ending with the frame at ts 2
+    for ts in range(14):
+        metrics.update(ts, 0.3, face_found=True, closed=ts == 1)
+        if ts == 12:
+            # the frames before ts 2 are out of the window, the blink is still in
+            assert metrics.mean_blink_duration == pytest.approx(1)
+            # the frames from ts 2 to 12 weigh a second each
+            assert metrics.blink_rate == pytest.approx(60 / 11)
+    # the frame at ts 2 is out of the window
+    assert metrics.blink_rate == 0
+    assert math.isnan(metrics.mean_blink_duration)
+
+
+def test_score_without_faces():
+    metrics = DrowsinessMetrics()
+    assert metrics.score == 0
+    for ts in range(10):
+        metrics.update(ts * 0.1, float("nan"), face_found=False, closed=True)
+    assert metrics.perclos == 0
+    assert metrics.face_missing_fraction == 1
+    assert metrics.score == 1
+    report = metrics.report()
+    assert math.isnan(report.ear_mean) and math.isnan(report.ear_std)
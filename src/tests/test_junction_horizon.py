@@ -0,0 +1,51 @@
+"""
+JunctionHorizon on fake waypoints: straight lanes without junctions, one waypoint per
+meter, connected through a fake topology.
+"""
+import pytest
+
+pytest.importorskip("carla")
+
+from pullover.junctions import JunctionHorizon  # noqa: E402
+from pullover.topology import TopologyIndex  # noqa: E402
+
+SENSORS_RANGE = 50
+
+
+class _Waypoint:
+    def __init__(self, road_id: int, length: float, s: float):
+        self.road_id = road_id
+        self.section_id = 0
+        self.lane_id = -1
+        self.length = length
+        self.s = s
+        self.is_junction = False
+
+    def next_until_lane_end(self, distance: float) -> list["_Waypoint"]:
+        waypoints: list[_Waypoint] = []
+        s = self.s + distance
+        while s < self.length:
+            waypoints.append(_Waypoint(self.road_id, self.length, s))
+            s += distance
+        waypoints.append(_Waypoint(self.road_id, self.length, self.length))
+        return waypoints
+
+
+DRIVEN_S = [0, 0.4, 1.2, 10.3, 100.7, 149, 151, 190]
+
+
+def test_missing_lane_continuation_is_a_junction_on_every_tick():
+    horizon = JunctionHorizon(TopologyIndex([]))
+    for s in DRIVEN_S:
+        assert horizon.first_junction_distance(_Waypoint(1, 200, s), SENSORS_RANGE) == 0
+
+
+def test_lane_continuation_is_followed():
+    # a ring of two roads, so that every lane end has a continuation
+    topology = [
+        (_Waypoint(1, 200, 0), _Waypoint(2, 1000, 0)),
+        (_Waypoint(2, 1000, 0), _Waypoint(1, 200, 0)),
+    ]
+    horizon = JunctionHorizon(TopologyIndex(topology))
+    for s in DRIVEN_S:
+        assert horizon.first_junction_distance(_Waypoint(1, 200, s), SENSORS_RANGE) is None
@@ -0,0 +1,109 @@
+"""
+Equivalence of the pull over safety decision of SafePulloverChecker with the per-point
+loop it replaced, on fixed radar point clouds (the radar is mounted as in run_scenario).
+"""
+import math
+
+import numpy as np
+import pytest
+
+carla = pytest.importorskip("carla")
+
+from pullover.checker import SafePulloverChecker  # noqa: E402
+from pullover.utils import to_cartesian_coords  # noqa: E402
+
+from .carla_port import inverse_transform_point, transform_point  # noqa: E402
+
+SCANNED_AREA_X_OFFSET = 1.0
+RADAR_LOCATION = (2.0, 0.0, 0.2)
+RADAR_YAW = 50.0
+
+
+class _RadarSensor:
+    def listen(self, callback):
+        self.callback = callback
+
+
+class _RadarMeasurement:
+    def __init__(self, detections: np.ndarray, transform: "carla.Transform", frame: int, timestamp: float):
+        self.raw_data = detections.tobytes()
+        self.transform = transform
+        self.frame = frame
+        self.timestamp = timestamp
+        self._len = detections.shape[0]
+
+    def __len__(self):
+        return self._len
+
+
+def _baseline_is_safe(points: np.ndarray, location, rotation, depth, scan_width, steer, min_inliers) -> bool:
+    """The per-point decision replaced by the batched one (without the debug drawing)."""
+    pitch, yaw, roll = rotation
+    rotated = (pitch, yaw + steer, roll)
+    thr = depth / SCANNED_AREA_X_OFFSET
+    inliers = 0
+    for p in points:
+        x, y, _ = inverse_transform_point(location, rotated, tuple(float(v) for v in p))
+        is_relevant = (x / y) < thr
+        in_scanned_area = y < SCANNED_AREA_X_OFFSET + scan_width and x < depth
+        inliers += is_relevant and in_scanned_area
+    return inliers < min_inliers
+
+
+def _case(seed: int):
+    rng = np.random.default_rng(seed)
+    location = (float(rng.uniform(-200, 200)), float(rng.uniform(-200, 200)), float(rng.uniform(0, 5)))
+    rotation = (float(rng.uniform(-3, 3)), float(rng.uniform(-180, 180)), float(rng.uniform(-3, 3)))
+    n = int(rng.integers(0, 60))
+    # raw detections: velocity, azimuth, altitude, depth (radians and meters)
+    detections = np.stack(
+        [
+            rng.uniform(-30, 30, n),
+            rng.uniform(-math.radians(42.5), math.radians(42.5), n),
+            rng.uniform(-math.radians(1), math.radians(1), n),
+            rng.uniform(0.5, 60, n),
+        ],
+        axis=1,
+    ).astype(np.float32)
+    pitch, yaw, roll = rotation
+    radar_transform = carla.Transform(
+        carla.Location(*transform_point(location, rotation, RADAR_LOCATION)),
+        carla.Rotation(pitch=pitch, yaw=yaw + RADAR_YAW, roll=roll),
+    )
+    return (
+        location,
+        rotation,
+        _RadarMeasurement(detections, radar_transform, frame=seed, timestamp=1.0),
+        float(rng.uniform(10, 60)),  # depth
+        float(rng.uniform(1, 4)),  # scan width
+        float(rng.uniform(-10, 10)),  # steer
+        int(rng.integers(1, 10)),  # min inliers
+    )
+
+
+def test_decision_matches_per_point_loop():
+    mismatches = []
+    verdicts = set()
+    for seed in range(400):
+        location, rotation, measurement, depth, scan_width, steer, min_inliers = _case(seed)
+        sensor = _RadarSensor()
+        checker = SafePulloverChecker(
+            sensor,  # pyright: ignore[reportArgumentType]
+            vehicle=None,  # pyright: ignore[reportArgumentType]
+            scanned_area_x_offset=SCANNED_AREA_X_OFFSET,
+            min_inliers=min_inliers,
+        )
+        sensor.callback(measurement)
+        pitch, yaw, roll = rotation
+        vehicle_tr = carla.Transform(carla.Location(*location), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll))
+
+        is_safe = checker._is_pullover_safe_no_delay(depth, scan_width, steer, vehicle_transform=vehicle_tr)
+        points = to_cartesian_coords(measurement)  # pyright: ignore[reportArgumentType]
+        expected = _baseline_is_safe(points, location, rotation, depth, scan_width, steer, min_inliers)
+        if is_safe != expected:
+            mismatches.append(seed)
+        verdicts.add(is_safe)
+
+    assert mismatches == []
+    # the cases cover both verdicts
+    assert verdicts == {True, False}
@@ -0,0 +1,99 @@
+"""
+Equivalence of the batched radar transforms (pullover.utils) with the per-point
+CARLA path they replaced (see carla_port). CARLA types are replaced by namespaces
+with the same attributes, so these tests don't require the simulator package.
+"""
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pullover.utils import inverse_transform_points, to_cartesian_coords, transform_points
+
+from .carla_port import inverse_transform_point, transform_point
+
+# radar points are float32 and up to ~100 m away: 1 mm
+POINT_TOLERANCE = 1e-3
+# float64 batched transforms against the float64 scalar port
+TRANSFORM_TOLERANCE = 1e-9
+
+
+def _random_pose(rng: np.random.Generator):
+    location = tuple(float(v) for v in rng.uniform(-200, 200, 3))
+    rotation = (float(rng.uniform(-90, 90)), float(rng.uniform(-180, 180)), float(rng.uniform(-180, 180)))
+    return location, rotation
+
+
+def _namespace_transform(location, rotation) -> SimpleNamespace:
+    """Namespace with the attributes of carla.Transform read by pullover.utils."""
+    x, y, z = location
+    pitch, yaw, roll = rotation
+    return SimpleNamespace(
+        location=SimpleNamespace(x=x, y=y, z=z),
+        rotation=SimpleNamespace(pitch=pitch, yaw=yaw, roll=roll),
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_transform_points_matches_scalar_transform(seed: int):
+    rng = np.random.default_rng(seed)
+    location, rotation = _random_pose(rng)
+    points = rng.uniform(-100, 100, (200, 3))
+    tr = _namespace_transform(location, rotation)
+
+    expected = np.array([transform_point(location, rotation, p) for p in points])
+    np.testing.assert_allclose(transform_points(points, tr), expected, rtol=0, atol=TRANSFORM_TOLERANCE)
+
+    expected = np.array([inverse_transform_point(location, rotation, p) for p in points])
+    np.testing.assert_allclose(inverse_transform_points(points, tr), expected, rtol=0, atol=TRANSFORM_TOLERANCE)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_inverse_transform_points_roundtrip(seed: int):
+    rng = np.random.default_rng(seed)
+    tr = _namespace_transform(*_random_pose(rng))
+    points = rng.uniform(-100, 100, (200, 3))
+    np.testing.assert_allclose(
+        inverse_transform_points(transform_points(points, tr), tr), points, rtol=0, atol=TRANSFORM_TOLERANCE
+    )
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_to_cartesian_coords_matches_per_detection_conversion(seed: int):
+    rng = np.random.default_rng(seed)
+    location, rotation = _random_pose(rng)
+    n = 500
+    # raw detections: velocity, azimuth, altitude, depth (radians and meters)
+    detections = np.stack(
+        [
+            rng.uniform(-30, 30, n),
+            rng.uniform(-math.radians(45), math.radians(45), n),
+            rng.uniform(-math.radians(5), math.radians(5), n),
+            rng.uniform(0.5, 100, n),
+        ],
+        axis=1,
+    ).astype(np.float32)
+    measurement = SimpleNamespace(raw_data=detections.tobytes(), transform=_namespace_transform(location, rotation))
+
+    pitch, yaw, roll = rotation
+    expected = np.array(
+        [
+            # previous per-detection path: the forward vector (depth - 0.25, 0, 0) rotated by the
+            # sensor rotation plus the detection altitude and azimuth, moved to the sensor location
+            transform_point(
+                location,
+                (pitch + math.degrees(float(alt)), yaw + math.degrees(float(azi)), roll),
+                (float(depth) - 0.25, 0.0, 0.0),
+            )
+            for _, azi, alt, depth in detections
+        ]
+    )
+
+    pts = to_cartesian_coords(measurement)  # pyright: ignore[reportArgumentType]
+    assert pts.shape == (n, 3) and pts.dtype == np.float32
+    np.testing.assert_allclose(pts, expected, rtol=0, atol=POINT_TOLERANCE)
+
+    out = np.empty((n, 3), dtype=np.float32)
+    assert to_cartesian_coords(measurement, out=out) is out  # pyright: ignore[reportArgumentType]
+    np.testing.assert_allclose(out, expected, rtol=0, atol=POINT_TOLERANCE)
@@ -3,11 +3,16 @@ from state_machine.logging_config import LoggingConfig
 
 class VehicleLoggingConfig(LoggingConfig):
     _log_main_vehicle_controls: bool
+    _log_step_cache: bool
 
     @property
     def log_main_vehicle_controls(self):
         return self._log_main_vehicle_controls
 
+    @property
+    def log_step_cache(self):
+        return self._log_step_cache
+
     def __init__(
         self,
         log_entries: bool = False,
@@ -19,6 +24,7 @@ class VehicleLoggingConfig(LoggingConfig):
         log_transition_actions: bool = False,
         log_state_actions: bool = False,
         log_main_vehicle_controls: bool = False,
+        log_step_cache: bool = False,
     ):
         super().__init__(
             log_entries=log_entries,
@@ -31,3 +37,4 @@ class VehicleLoggingConfig(LoggingConfig):
             log_state_actions=log_state_actions,
         )
         self._log_main_vehicle_controls = log_main_vehicle_controls
+        self._log_step_cache = log_step_cache
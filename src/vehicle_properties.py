@@ -0,0 +1,33 @@
+from carla import Vector3D, Vehicle
+
+
+class VehicleProperties:
+    """
+    Static properties of a spawned vehicle, read once instead of querying the simulator
+    every time they are needed.
+
+    If the physics of the vehicle is changed at runtime `refresh` must be called.
+    """
+
+    bounding_box_extent: Vector3D
+    """
+    Half the size of the vehicle bounding box along each axis (meters)
+    """
+    max_steer_angle: float
+    """
+    Maximum steering angle of the front wheels (degrees)
+    """
+
+    _vehicle: Vehicle
+
+    def __init__(self, vehicle: Vehicle):
+        self._vehicle = vehicle
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reads again all the properties from the simulator
+        """
+        self.bounding_box_extent = self._vehicle.bounding_box.extent
+        # The first wheel is a front one whatever the number of wheels
+        self.max_steer_angle = self._vehicle.get_physics_control().wheels[0].max_steer_angle
@@ -0,0 +1,56 @@
+from carla import Location, Transform, Vector3D, Vehicle, World
+
+
+class VehicleSnapshot:
+    """
+    State of the vehicle at a given simulation frame.
+
+    It is read once per step from the world snapshot so that state callbacks don't
+    need to query the simulator every time they need the vehicle state.
+    """
+
+    timestamp: float
+    """
+    Simulation time (seconds) elapsed since the beginning of the episode
+    """
+    transform: Transform
+    velocity: Vector3D
+    acceleration: Vector3D
+
+    @property
+    def location(self) -> Location:
+        return self.transform.location
+
+    def __init__(
+        self,
+        timestamp: float,
+        transform: Transform,
+        velocity: Vector3D,
+        acceleration: Vector3D,
+    ):
+        self.timestamp = timestamp
+        self.transform = transform
+        self.velocity = velocity
+        self.acceleration = acceleration
+
+    @staticmethod
+    def capture(world: World, vehicle: Vehicle) -> "VehicleSnapshot":
+        """
+        Reads the current state of the vehicle from the world snapshot
+        """
+        world_snapshot = world.get_snapshot()
+        actor_snapshot = world_snapshot.find(vehicle.id)
+        if actor_snapshot is None:
+            # The vehicle may not be part of the snapshot yet (ex: right after being spawned)
+            return VehicleSnapshot(
+                timestamp=world_snapshot.timestamp.elapsed_seconds,
+                transform=vehicle.get_transform(),
+                velocity=vehicle.get_velocity(),
+                acceleration=vehicle.get_acceleration(),
+            )
+        return VehicleSnapshot(
+            timestamp=world_snapshot.timestamp.elapsed_seconds,
+            transform=actor_snapshot.get_transform(),
+            velocity=actor_snapshot.get_velocity(),
+            acceleration=actor_snapshot.get_acceleration(),
+        )
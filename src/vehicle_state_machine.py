@@ -1,5 +1,7 @@
 import math
+import time
 from enum import StrEnum, auto
+from pathlib import Path
 from typing import cast, override
 
 import pygame
@@ -21,7 +23,9 @@ from carla import (
     World,
 )
 
+from inattention.calibration import DriverProfile, ThresholdCalibrator
 from inattention.detector import InattentionDetector
+from inattention.pool import InattentionProcessPool
 from inattention.utils import CameraStream
 from pygame_dashboard_buttons import PygameDashboardButtons
 from pygame_io import PygameIO
@@ -34,7 +38,13 @@ from state_machine.sync_state_machine import (
     Transition,
 )
 from pullover.checker import SafePulloverChecker
+from pullover.clock import SimulationClock
+from pullover.junctions import JunctionHorizon
+from pullover.topology import TopologyIndex
+from step_cache import StepCache
 from vehicle_logging_config import VehicleLoggingConfig
+from vehicle_properties import VehicleProperties
+from vehicle_snapshot import VehicleSnapshot
 
 
 class VehicleParams:
@@ -80,8 +90,53 @@ class VehicleParams:
     Valid values are >= 0 and <= 1
     """
 
+    observed_time_percentage: float = 0.5
+    """
+    A percentage representing the minimum amount of time covered by the processed
+    frames of the driver camera, otherwise the driver is considered not to be
+    paying attention (the detector may have stalled or the camera may be stuck).
+    Valid values are >= 0 and <= 1
+    """
+
+    drowsiness_score_limit: float = 1
+    """
+    Inattention score of the driver (see InattentionDetector.inattention_score) at
+    which they are considered not to be paying attention, even if the attention time
+    of the last check interval was enough (ex: a long eye closure or a high PERCLOS).
+    Valid values are >= 0 and <= 1
+    """
+
     wake_up_sound_delay: float = 8
 
+    face_detection_scale: float = 1
+    """
+    Scale factor applied to the driver camera frames before detecting the face.
+    Lower values make the detection faster, landmarks are still computed at full resolution.
+    """
+    face_detection_upsample: int = 1
+    """
+    Number of times the driver camera frames are upsampled by the face detector
+    """
+    face_backend: str = "dlib"
+    """
+    Backend computing the eye landmarks of the driver ("dlib" or "opencv")
+    """
+    eye_threshold: float = 0.23
+    """
+    EAR under which the eyes of the driver are considered closed,
+    used until a calibrated one is available
+    """
+    eye_threshold_calibration_time: float = 120
+    """
+    Seconds of driver camera frames (with a face in view) collected at the beginning of
+    lane keeping in order to calibrate the EAR threshold of the driver. 0 disables the calibration
+    """
+    driver_profile_path: str | None = None
+    """
+    JSON file with the calibrated EAR threshold of the driver.
+    If it exists the threshold is loaded from it and the calibration is skipped,
+    otherwise it is written once the calibration is complete
+    """
     @property
     def max_pull_over_preparation_speed_kmh(self) -> float:
         """
@@ -115,9 +170,18 @@ class VehicleData:
     world: World
     map: Map
     topology: list[tuple[Waypoint, Waypoint]]
+    topology_index: TopologyIndex
+    """
+    Index over the topology for constant time lane continuation lookups
+    """
     traffic_manager: TrafficManager
     params: VehicleParams
 
+    snapshot: VehicleSnapshot
+    """
+    State of the vehicle read once at the beginning of each step.
+    State callbacks should read the vehicle state from here instead of querying the simulator.
+    """
     speed: Vector3D = Vector3D()
     pull_over_acceleration: float = 0
     """
@@ -133,12 +197,27 @@ class VehicleData:
     inattention_time: float = 0
     """
     Accumulates the amount of time (seconds) in which the driver is 
-    not paying attention to the road
+    not paying attention to the road.
+    Each processed frame accounts for the time elapsed since the previous capture
     """
     attention_time: float = 0
     """
     Accumulates the amount of time (seconds) in which the driver is 
-    paying attention to the road
+    paying attention to the road.
+    Each processed frame accounts for the time elapsed since the previous capture
+    """
+    detection_history_seq: int = 0
+    """
+    Sequence number of the next detection record to be consumed from the inattention detector history
+    """
+    last_detection_capture_ts: float | None = None
+    """
+    Capture timestamp of the last consumed detection record
+    """
+    inattention_check_start: float = 0
+    """
+    When the attention accumulators were last reset, in the time base of the
+    capture timestamps (time.monotonic)
     """
 
     @property
@@ -146,6 +225,11 @@ class VehicleData:
         return self.speed.length() * 3.6
 
     vehicle: Vehicle
+    vehicle_properties: VehicleProperties
+    """
+    Static properties of the vehicle (bounding box, steering, physics limits).
+    Call `vehicle_properties.refresh()` after changing the vehicle physics at runtime.
+    """
     vehicle_ackermann_control: VehicleAckermannControl | None = None
     """
     Applied a the end of each step only if not None
@@ -165,7 +249,25 @@ class VehicleData:
     """
     Detector used to spot inattentive behaviours in the driver.
     """
+    threshold_calibrator: ThresholdCalibrator | None
+    """
+    Learns the EAR threshold of the driver during lane keeping.
+    None if the threshold has been loaded from the driver profile or once the calibration is complete
+    """
+    clock: SimulationClock
+    """
+    Simulation time, synchronized with the world snapshot at the beginning of every step.
+    """
     obstacles_detector: SafePulloverChecker
+    step_cache: StepCache
+    """
+    Values derived from the simulation state that are computed at most once per step.
+    It is invalidated by VehicleStateMachine.step
+    """
+    junction_horizon: JunctionHorizon
+    """
+    Keeps track of the lane ahead of the vehicle between steps in order to detect junctions.
+    """
 
     def __init__(
         self,
@@ -179,6 +281,7 @@ class VehicleData:
         front_radar: Sensor,
         wake_up_sound: pygame.mixer.Sound | None,
         logging_config: VehicleLoggingConfig | None,
+        inattention_pool: InattentionProcessPool | None = None,
     ):
         if logging_config is None:
             self.logging_config = VehicleLoggingConfig()
@@ -188,21 +291,46 @@ class VehicleData:
         self.world = world
         self.map = map
         self.topology = map.get_topology()
+        self.topology_index = TopologyIndex(self.topology)
         self.traffic_manager = traffic_manager
         self.vehicle = vehicle
+        self.vehicle_properties = VehicleProperties(vehicle)
+        self.snapshot = VehicleSnapshot.capture(world, vehicle)
+        self.clock = SimulationClock(self.snapshot.timestamp)
         self.pygame_io = pygame_io
         self.manual_control = PygameVehicleControl(vehicle)
+        eye_threshold = params.eye_threshold
+        self.threshold_calibrator = None
+        profile = (
+            DriverProfile.load(params.driver_profile_path)
+            if params.driver_profile_path is not None
+            else None
+        )
+        if profile is not None:
+            eye_threshold = profile.eye_threshold
+        elif params.eye_threshold_calibration_time > 0:
+            self.threshold_calibrator = ThresholdCalibrator(
+                duration=params.eye_threshold_calibration_time
+            )
         self.inattention_detector = InattentionDetector(
-            driver_camera_stream, eye_threshold=0.23
+            driver_camera_stream,
+            eye_threshold=eye_threshold,
+            face_detection_scale=params.face_detection_scale,
+            face_detection_upsample=params.face_detection_upsample,
+            pool=inattention_pool,
+            face_backend=params.face_backend,
         )
-        offset = float(vehicle.bounding_box.extent.y)
+        offset = float(self.vehicle_properties.bounding_box_extent.y)
         self.obstacles_detector = SafePulloverChecker(
             radar_sensor=front_radar,
             vehicle=vehicle,
             min_inliers=2,
             scanned_area_x_offset=offset,
             debug=True,
+            clock=self.clock,
         )
+        self.junction_horizon = JunctionHorizon(self.topology_index)
+        self.step_cache = StepCache()
         self.wake_up_sound = wake_up_sound
 
 
@@ -245,6 +373,7 @@ class VehicleStateMachine(SyncStateMachine[VehicleData, VehicleTimers]):
         front_radar: Sensor,
         wake_up_sound: pygame.mixer.Sound | None = None,
         logging_config: VehicleLoggingConfig | None = None,
+        inattention_pool: InattentionProcessPool | None = None,
     ):
         super().__init__(
             [WrapperS()],
@@ -259,20 +388,28 @@ class VehicleStateMachine(SyncStateMachine[VehicleData, VehicleTimers]):
                 front_radar=front_radar,
                 wake_up_sound=wake_up_sound,
                 logging_config=logging_config,
+                inattention_pool=inattention_pool,
             ),
             logging_config=logging_config,
         )
 
     @override
     def step(self, dt: float) -> bool:
+        # The simulation does not advance during a step, so its state is read once at the
+        # beginning and values derived from it are reused by every state callback
+        self._data.step_cache.invalidate()
+        self._data.snapshot = VehicleSnapshot.capture(self._data.world, self._data.vehicle)
+        self._data.clock.sync(self._data.snapshot.timestamp)
+        self._data.speed = self._data.snapshot.velocity
         result = super().step(dt)
+        if self._vehicle_logging_config().log_step_cache:
+            self._vehicle_log("computed:", self._data.step_cache.step_computations)
+            self._vehicle_log("cached:  ", self._data.step_cache.step_hits)
         if self._vehicle_logging_config().log_main_vehicle_controls:
             control = self._data.vehicle.get_control()
-            acc = self._data.vehicle.get_acceleration()
+            acc = self._data.snapshot.acceleration
             acc_len = acc.length()
-            acc_len = (
-                acc_len if acc.dot(self._data.vehicle.get_velocity()) >= 0 else -acc_len
-            )
+            acc_len = acc_len if acc.dot(self._data.snapshot.velocity) >= 0 else -acc_len
             self._vehicle_log("accel:", acc_len, "m/s^2")
             self._vehicle_log("speed:", self._data.speed_kmh, "km/h")
             self._vehicle_log("throt:", control.throttle)
@@ -300,7 +437,6 @@ class WrapperS(State[VehicleData, VehicleTimers]):
 
     @override
     def on_early_do(self, data: VehicleData, ctx: VehicleContext):
-        data.speed = data.vehicle.get_velocity()
         data.vehicle_control = VehicleControl()
         data.vehicle_ackermann_control = None
         data.pygame_events = data.pygame_io.update()
@@ -325,6 +461,33 @@ class WrapperS(State[VehicleData, VehicleTimers]):
     @override
     def on_exit(self, data: VehicleData, ctx: Context[VehicleTimers]):
         data.inattention_detector.close()
+        for name, verdicts in (
+            ("pull over safety", data.obstacles_detector.verdicts),
+            ("junction scan", data.junction_horizon.verdicts),
+        ):
+            print(
+                "VEHICLE_STATE_MACHINE: ",
+                f"{name}: {verdicts.evaluations} evaluations, {verdicts.reuses} saved by reusing the latest verdict",
+            )
+        for key, computations in data.step_cache.total_computations.items():
+            print(
+                "VEHICLE_STATE_MACHINE: ",
+                f"{key}: computed {computations} times, {data.step_cache.total_hits.get(key, 0)} reused within the same step",
+            )
+        print(
+            "VEHICLE_STATE_MACHINE: ",
+            f"radar: {data.obstacles_detector.dropped_radar_frames} sensor frames dropped before reaching the pull over safety check",
+        )
+        mean_latency = data.inattention_detector.mean_latency
+        if mean_latency is not None:
+            print(
+                "VEHICLE_STATE_MACHINE: ",
+                f"inattention detection: {mean_latency * 1000:.1f} ms mean latency from capture to verdict",
+            )
+        print(
+            "VEHICLE_STATE_MACHINE: ",
+            f"drowsiness over the latest minute: {data.inattention_detector.drowsiness_report()}",
+        )
 
     def _is_quit_event(self, e: pygame.event.Event) -> bool:
         return e.type == pygame.QUIT
@@ -423,13 +586,30 @@ class LaneKeepingS(VehicleState):
             data.vehicle, data.params.cruise_target_speed_kmh
         )
         data.vehicle.set_autopilot(True, data.traffic_manager.get_port())
+        # Detections made before entering the state are not relevant
+        data.detection_history_seq = data.inattention_detector.history.seq
+        data.last_detection_capture_ts = None
 
     @override
     def on_do(self, data: VehicleData, ctx: VehicleContext):
-        if data.inattention_detector.detect():
-            data.inattention_time += ctx.dt
-        else:
-            data.attention_time += ctx.dt
+        _ = data.inattention_detector.detect()
+        # Only the frames processed since the last step are accounted for, each
+        # one for the interval from the previous capture, so that a slow detector
+        # doesn't count the same verdict multiple times
+        history = data.inattention_detector.history
+        records, data.detection_history_seq = history.since(data.detection_history_seq)
+        for record in records:
+            weight = history.weight(record.capture_ts, data.last_detection_capture_ts)
+            data.last_detection_capture_ts = record.capture_ts
+            if record.label == 1:
+                data.attention_time += weight
+            else:
+                data.inattention_time += weight
+            if data.threshold_calibrator is not None and record.face_found:
+                data.threshold_calibrator.add(record.ear, weight)
+
+        if data.threshold_calibrator is not None and data.threshold_calibrator.is_complete:
+            _complete_threshold_calibration(data)
 
     @override
     def on_exit(self, data: VehicleData, ctx: VehicleContext):
@@ -440,6 +620,22 @@ class LaneKeepingS(VehicleState):
         data.vehicle.apply_control(VehicleControl(throttle=0.01))
 
 
+def _complete_threshold_calibration(data: VehicleData):
+    assert data.threshold_calibrator is not None
+    path = data.params.driver_profile_path
+    profile = data.threshold_calibrator.profile(
+        Path(path).stem if path is not None else "driver"
+    )
+    data.inattention_detector.eye_threshold = profile.eye_threshold
+    if path is not None:
+        profile.save(path)
+    data.threshold_calibrator = None
+    print(
+        "VEHICLE_STATE_MACHINE: ",
+        f"EAR threshold calibrated to {profile.eye_threshold:.3f} (median EAR {profile.open_ear:.3f})",
+    )
+
+
 def _reset_inattention_check_timer_and_accumulators(
     data: VehicleData, ctx: VehicleContext
 ):
@@ -448,13 +644,25 @@ def _reset_inattention_check_timer_and_accumulators(
     )
     data.inattention_time = 0
     data.attention_time = 0
+    data.inattention_check_start = time.monotonic()
 
 
 def _inattention_detected(data: VehicleData) -> bool:
     tot = data.inattention_time + data.attention_time
+    # The accumulators are in capture time, which is not the simulation time of the timer
+    elapsed = time.monotonic() - data.inattention_check_start
+    if tot < elapsed * data.params.observed_time_percentage:
+        # Not enough frames processed to tell: it must not count as attention
+        return True
     return data.attention_time < tot * data.params.attention_time_percentage
 
 
+def _drowsiness_detected(data: VehicleData) -> bool:
+    # The score covers the latest minute, so it is only used to detect inattention:
+    # the driver would be considered drowsy for up to a minute after waking up
+    return data.inattention_detector.inattention_score >= data.params.drowsiness_score_limit
+
+
 class NoInattentionDetectedS(VehicleState):
     @override
     def transitions(self) -> list[VehicleTransition]:
@@ -464,7 +672,7 @@ class NoInattentionDetectedS(VehicleState):
                 condition=lambda data, ctx: ctx.timer(
                     VehicleTimers.INATTENTION_CHECK
                 ).is_elapsed()
-                and _inattention_detected(data),
+                and (_inattention_detected(data) or _drowsiness_detected(data)),
             )
         ]
 
@@ -543,13 +751,18 @@ def _pull_over_is_safe(data: VehicleData) -> PullOverSafety:
     Computes whether pulling over is safe by taking into account:
     - Eventual obstacles in the emergency lane
     - Ability to stop the vehicle before any junction
+    The result is computed once per step.
     """
+    return data.step_cache.get("pull_over_safety", lambda: _compute_pull_over_safety(data))
+
+
+def _compute_pull_over_safety(data: VehicleData) -> PullOverSafety:
     max_stop_dist = _max_stopping_distance(data)
     max_stop_dist = max(max_stop_dist, data.params.min_pull_over_space)
     scan_width = (
-        data.vehicle.bounding_box.extent.y * 2 * 1.65
+        data.vehicle_properties.bounding_box_extent.y * 2 * 1.65
         - _signed_lateral_distance(
-            data.vehicle.get_location(), _curr_waypoint(data).transform
+            data.snapshot.location, _curr_waypoint(data).transform
         )
     )
     if max_stop_dist > data.params.sensors_max_range:
@@ -558,6 +771,7 @@ def _pull_over_is_safe(data: VehicleData) -> PullOverSafety:
         max_stop_dist + 10,
         scan_width,
         data.vehicle.get_wheel_steer_angle(VehicleWheelLocation.FR_Wheel),
+        vehicle_transform=data.snapshot.transform,
     ):
         return PullOverSafety.OBSTACLE_DETECTED
     if not _right_lane_is_shoulder(data):
@@ -570,20 +784,16 @@ def _pull_over_is_safe(data: VehicleData) -> PullOverSafety:
     return PullOverSafety.SAFE
 
 
-def _waypoints_roughly_same_direction(w1: Waypoint, w2: Waypoint) -> bool:
-    return w1.transform.get_forward_vector().dot(w2.transform.get_forward_vector()) > 0
-
-
-def _waypoints_same_road(w1: Waypoint, w2: Waypoint) -> bool:
-    return w1.road_id == w2.road_id
-
-
 def _right_lane_is_shoulder(data: VehicleData) -> bool:
     right_lane = _curr_waypoint(data).get_right_lane()
     return right_lane is not None and right_lane.lane_type == LaneType.Shoulder
 
 
 def _curr_waypoint(data: VehicleData) -> Waypoint:
+    return data.step_cache.get("curr_waypoint", lambda: _find_curr_waypoint(data))
+
+
+def _find_curr_waypoint(data: VehicleData) -> Waypoint:
     # We use the target waypoint as getting a waypoint under the vehicle position
     # may return a waypoint that is part of another overlapping lane
     next_action = cast(
@@ -593,7 +803,7 @@ def _curr_waypoint(data: VehicleData) -> Waypoint:
         target_waypoint = next_action[1]
         # Here we find a waypoint that is in the exact position of the car but on the correct lane
         distance_from_car = target_waypoint.transform.location.distance(
-            data.vehicle.get_location()
+            data.snapshot.location
         )
         return next(
             filter(
@@ -604,64 +814,7 @@ def _curr_waypoint(data: VehicleData) -> Waypoint:
         )
     else:
         # In case there is no next action whe use the current location waypoint
-        return data.map.get_waypoint(data.vehicle.get_location())
-
-
-def _first_junction_detected_distance(data: VehicleData) -> float | None:
-    # Here we compute a waypoint every meter ahead of the vehicle to later check if it is part of a junction
-    waypoints = [_curr_waypoint(data)]
-    # +1 because curr_waypoint is counted
-    sensors_range = int(data.params.sensors_max_range) + 1
-    while waypoints.__len__() < sensors_range:
-        last_w = waypoints[waypoints.__len__() - 1]
-        waypoints.extend(last_w.next_until_lane_end(1))
-        last_w = waypoints[waypoints.__len__() - 1]
-        first_of_next_section = next(
-            filter(
-                lambda tuple: last_w.road_id == tuple[0].road_id
-                and last_w.section_id == tuple[0].section_id
-                and last_w.lane_id == tuple[1].lane_id,
-                data.topology,
-            ),
-            None,
-        )
-        if first_of_next_section is None:
-            # Some roads intersections are connected in strange ways and i was unable
-            # to reliably find the correct lane continuation, in which case we assume
-            # there may be a junction (for safety reasons)
-            return 0
-        waypoints[waypoints.__len__() - 1] = first_of_next_section[1]
-
-    waypoints = waypoints[:sensors_range]
-    for distance, w in enumerate(waypoints):
-        # Junctions are road segments and as such they include both sides, so checking if
-        # the waypoint is part of a junction is not enough because we don't care if the
-        # actual exit or entry is on the other side of the road
-        if w.is_junction:
-            junction_waypoints = w.get_junction().get_waypoints(LaneType.Any)
-
-            # Here we take just those waypoints that point to the same direction as the vehicle
-            junction_waypoints = filter(
-                lambda t: _waypoints_roughly_same_direction(t[0], w)
-                and _waypoints_roughly_same_direction(t[1], w),
-                junction_waypoints,
-            )
-
-            # Here we search for a waypoint that is part of a different road than the vehicle one
-            waypoint_in_different_road = next(
-                filter(
-                    lambda t: not _waypoints_same_road(t[0], w)
-                    or not _waypoints_same_road(t[1], w),
-                    junction_waypoints,
-                ),
-                None,
-            )
-
-            # If there is at least one waypoint that is part of a different road then
-            # we assume there is an actual junction on the vehicle side of the road
-            if waypoint_in_different_road is not None:
-                return distance
-    return None
+        return data.map.get_waypoint(data.snapshot.location)
 
 
 def _max_stopping_distance(data: VehicleData) -> float:
@@ -670,6 +823,12 @@ def _max_stopping_distance(data: VehicleData) -> float:
     and taking as current speed the maximum between the actual current speed
     and the minimum pull over speed
     """
+    return data.step_cache.get(
+        "max_stopping_distance", lambda: _compute_max_stopping_distance(data)
+    )
+
+
+def _compute_max_stopping_distance(data: VehicleData) -> float:
     speed = max(data.speed.length(), data.params.min_pull_over_speed_kmh / 3.6)
     return (speed**2) / (2 * abs(data.params.max_pull_over_acceleration))
 
@@ -696,14 +855,18 @@ class PullOverPreparationS(VehicleState):
             min(data.params.max_pull_over_preparation_speed_kmh, data.speed_kmh),
         )
         lane_offset = (
-            (_curr_waypoint(data).lane_width / 2) - data.vehicle.bounding_box.extent.y
+            (_curr_waypoint(data).lane_width / 2)
+            - data.vehicle_properties.bounding_box_extent.y
         ) * 0.9
         data.traffic_manager.vehicle_lane_offset(data.vehicle, lane_offset)
+        data.junction_horizon.reset()
 
     @override
     def on_do(self, data: VehicleData, ctx: VehicleContext):
         # We cache this value as it is heavy to compute an needs to be used multiple times
-        data.first_junction_distance = _first_junction_detected_distance(data)
+        data.first_junction_distance = data.junction_horizon.first_junction_distance(
+            _curr_waypoint(data), data.params.sensors_max_range
+        )
 
     @override
     def on_exit(self, data: VehicleData, ctx: VehicleContext):
@@ -716,7 +879,7 @@ class PullOverPreparationS(VehicleState):
                 condition=lambda data, ctx: _pull_over_is_safe(data)
                 != PullOverSafety.SAFE,
                 action=lambda data, ctx: data.world.debug.draw_string(
-                    data.vehicle.get_location() + Location(z=2),
+                    data.snapshot.location + Location(z=2),
                     _pull_over_is_safe(data).__str__(),
                 ),
             )
@@ -779,14 +942,14 @@ class PullingOverS(VehicleState):
         # a bit ahead of the vehicle
         vehicle_front = _vehicle_front(data)
         vehicle_front = Location(
-            vehicle_front + data.vehicle.get_transform().get_forward_vector() * 1
+            vehicle_front + data.snapshot.transform.get_forward_vector() * 1
         )
         # Since it is of maximum importance not to exceed the emergency lane margin
         # the fields are evaluated on the "front right corner" of the vehicle
         vehicle_front = Location(
             vehicle_front
-            + data.vehicle.get_transform().get_right_vector()
-            * data.vehicle.bounding_box.extent.y
+            + data.snapshot.transform.get_right_vector()
+            * data.vehicle_properties.bounding_box_extent.y
         )
         lane_w = cast(
             Waypoint, data.map.get_waypoint(vehicle_front, lane_type=LaneType.Shoulder)
@@ -826,8 +989,8 @@ def _signed_lateral_distance(of: Location, to: Transform) -> float:
 
 
 def _vehicle_front(data: VehicleData) -> Location:
-    vehicle_t = data.vehicle.get_transform()
-    vehicle_half_lenght = data.vehicle.bounding_box.extent.x
+    vehicle_t = data.snapshot.transform
+    vehicle_half_lenght = data.vehicle_properties.bounding_box_extent.x
     return Location(
         vehicle_t.location + vehicle_t.get_forward_vector() * vehicle_half_lenght
     )
@@ -835,7 +998,7 @@ def _vehicle_front(data: VehicleData) -> Location:
 
 def _emergency_lane_reached(data: VehicleData) -> bool:
     waypoint = data.map.get_waypoint(
-        data.vehicle.get_location(), lane_type=LaneType.Any
+        data.snapshot.location, lane_type=LaneType.Any
     )
     return waypoint.lane_type == LaneType.Shoulder
 
@@ -845,7 +1008,7 @@ def _clamp(a: float, min_: float, max_: float) -> float:
 
 
 def _steer_to_radians(data: VehicleData, steer: float) -> float:
-    max_steer_angle_deg = data.vehicle.get_physics_control().wheels[0].max_steer_angle
+    max_steer_angle_deg = data.vehicle_properties.max_steer_angle
     return math.radians(max_steer_angle_deg) * _clamp(steer, -1, 1)
 
 
@@ -917,10 +1080,10 @@ class EmergencyLaneReachedS(VehicleState):
 
     @override
     def on_do(self, data: VehicleData, ctx: VehicleContext):
-        waypoint = data.map.get_waypoint(data.vehicle.get_location())
+        waypoint = data.map.get_waypoint(data.snapshot.location)
         if (
             waypoint.transform.get_forward_vector().dot(
-                data.vehicle.get_transform().get_forward_vector()
+                data.snapshot.transform.get_forward_vector()
             )
             < 0.999
         ):